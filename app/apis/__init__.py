@@ -1,4 +1,4 @@
-from . import customers, health, devices
+from . import customers, health, devices, metrics
 from fastapi import FastAPI
 from app.config import config
 
@@ -6,3 +6,5 @@ def configure_routes(app: FastAPI):
     app.include_router(router=health.router, prefix=config.OPENAPI_PREFIX)
     app.include_router(router=customers.router, prefix=config.OPENAPI_PREFIX)
     app.include_router(router=devices.router, prefix=config.OPENAPI_PREFIX)
+    # Served at the conventional scrape path, outside the API prefix.
+    app.include_router(router=metrics.router)
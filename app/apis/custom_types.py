@@ -1,6 +1,10 @@
 import math
+from abc import abstractmethod
 import urllib.parse
-from typing import Dict, Optional, Tuple
+from functools import lru_cache
+from typing import (
+    ClassVar, Dict, FrozenSet, Mapping, Optional, Tuple, Union
+)
 
 from fastapi import Query
 from pydantic import BaseModel, validator
@@ -8,9 +12,9 @@ from pydantic.dataclasses import dataclass
 from starlette.datastructures import URL as StarletteURL
 
 
-from app.config import PagingConfig
+from app.config import config as settings
 
-config = PagingConfig()
+config = settings.paging
 
 QueryParamsType = Tuple[Tuple[str, str], ...]
 
@@ -34,11 +38,34 @@ class PaginationParams:
     )
 
 
-class PaginationResponseHeaders(BaseModel):
+@dataclass(frozen=True, config=PaginationParamsConfig)
+class CursorPaginationParams:
+    cursor: Optional[str] = Query(
+        None, description="Opaque cursor of the page to fetch",
+        alias=config.CURSOR_KEY
+    )
+    size: int = Query(
+        config.DEFAULT_PAGE_SIZE,
+        ge=config.MIN_PAGE_SIZE,
+        le=config.MAX_PAGE_SIZE,
+        description="Page size",
+        alias=config.PER_PAGE_KEY,
+    )
+
+
+@lru_cache()
+def paging_aliases(params_class: type) -> FrozenSet[str]:
+    return frozenset(
+        x.alias
+        for x
+        in params_class.__pydantic_model__.__fields__.values()  # type: ignore  # noqa: E501
+    )
+
+
+class LinkResponseHeaders(BaseModel):
     url: urllib.parse.SplitResult
-    page: int
-    size: int
-    total: int
+
+    params_class: ClassVar[type] = PaginationParams
 
     class Config:
         frozen = True
@@ -53,11 +80,7 @@ class PaginationResponseHeaders(BaseModel):
 
     def _parse_qsl(self, query_string: str) -> QueryParamsType:
         params = set()
-        paging_params = {
-            x.alias
-            for x
-            in PaginationParams.__pydantic_model__.__fields__.values()  # type: ignore  # noqa: E501
-        }
+        paging_params = paging_aliases(self.params_class)
 
         for key, value in urllib.parse.parse_qsl(query_string):
             if key not in paging_params:
@@ -77,11 +100,27 @@ class PaginationResponseHeaders(BaseModel):
         return ", ".join(links)
 
     @property
-    def page_count(self) -> int:
+    @abstractmethod
+    def links(self) -> Mapping[str, Mapping[str, Union[int, str]]]:
+        """Query parameters of each link, keyed by relation."""
+
+
+class PaginationResponseHeaders(LinkResponseHeaders):
+    page: int
+    size: int
+    total: Optional[int]
+    has_next: bool = False
+
+    @property
+    def page_count(self) -> Optional[int]:
+        if self.total is None:
+            return None
         return max(math.ceil(self.total / self.size), config.MIN_PAGE)
 
     @property
     def next_num(self) -> Optional[int]:
+        if self.page_count is None:
+            return self.page + 1 if self.has_next else None
         return self.page + 1 if self.page < self.page_count else None
 
     @property
@@ -96,11 +135,12 @@ class PaginationResponseHeaders(BaseModel):
                 config.PER_PAGE_KEY: self.size,
             },
             "first": {config.PAGE_KEY: 1, config.PER_PAGE_KEY: self.size},
-            "last": {
+        }
+        if self.page_count is not None:
+            links["last"] = {
                 config.PAGE_KEY: self.page_count,
                 config.PER_PAGE_KEY: self.size
-            },
-        }
+            }
         if self.next_num:
             links["next"] = {
                 config.PAGE_KEY: self.next_num,
@@ -114,9 +154,38 @@ class PaginationResponseHeaders(BaseModel):
 
         return links
 
+    def headers(self) -> Dict[str, str]:
+        headers = {config.LINK_HEADER: self._format_links()}
+        if self.total is not None:
+            headers[config.TOTAL_COUNT_HEADER] = str(self.total)
+            headers[config.PAGE_COUNT_HEADER] = str(self.page_count)
+        return headers
+
+
+class CursorPaginationResponseHeaders(LinkResponseHeaders):
+    size: int
+    cursor: Optional[str] = None
+    next_cursor: Optional[str] = None
+
+    params_class: ClassVar[type] = CursorPaginationParams
+
+    @property
+    def links(self) -> Dict[str, Dict[str, Union[int, str]]]:
+        links: Dict[str, Dict[str, Union[int, str]]] = {
+            "self": {config.PER_PAGE_KEY: self.size},
+            "first": {config.PER_PAGE_KEY: self.size},
+        }
+        if self.cursor:
+            links["self"][config.CURSOR_KEY] = self.cursor
+        if self.next_cursor:
+            links["next"] = {
+                config.CURSOR_KEY: self.next_cursor,
+                config.PER_PAGE_KEY: self.size,
+            }
+
+        return links
+
     def headers(self) -> Dict[str, str]:
         return {
-            config.TOTAL_COUNT_HEADER: str(self.total),
-            config.PAGE_COUNT_HEADER: str(self.page_count),
             config.LINK_HEADER: self._format_links(),
         }
@@ -1,22 +1,37 @@
 import logging
 
-from redis import Redis
-from typing import List
+from redis.asyncio import Redis
+from typing import List, Literal
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import conlist
 from fastapi_jwt_auth import AuthJWT
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import controllers
-from app.database.depends import create_session
+from app.config import config
+from app.database.depends import (
+    bulkhead, create_cached_read_session, create_read_session, create_session
+)
 from app.schemas import (
         CustomerSchema, CustomerObj, ReqLoginSchema, ResLoginSchema,
-        ResCreateCustomer
+        ResCreateCustomer, ResBulkCreate, ResRefreshSchema
     )
+from app.utils.cache import (
+    CachedPage, device_customers_namespace, page_field, response_cache
+)
 from app.utils.get_db import get_redis_db
-from app.utils.auth import depend_customer_access_token
-# from .custom_types import PaginationParams, PaginationResponseHeaders
+from app.utils.auth import depend_customer_access_token, oauth2_scheme
+from app.utils.serialization import field_plan
+from app.utils.export import (
+    CSV_MEDIA_TYPE, NDJSON_MEDIA_TYPE, csv_chunks, customer_ndjson_chunks
+)
+from .custom_types import (
+    CursorPaginationParams, CursorPaginationResponseHeaders,
+    PaginationParams, PaginationResponseHeaders
+)
 
 logger = logging.getLogger("__main__")
 
@@ -61,11 +76,31 @@ async def create_customer(
     return await controllers.customers.create_customer(db, data)
 
 
+@router.post(
+    '/bulk',
+    response_model=ResBulkCreate,
+    responses=POST_CUSTOMER_STATUS_CODES,    # type: ignore
+    status_code=status.HTTP_201_CREATED,
+)
+async def bulk_create_customers(
+        data: conlist(   # type: ignore
+            CustomerSchema, min_items=1,
+            max_items=config.bulk.BULK_MAX_RECORDS),
+        db: AsyncSession = Depends(create_session)):
+    logger.info(f'Creating {len(data)} customers')
+    results = await controllers.customers.bulk_create_customers(db, data)
+    created = sum(1 for r in results if r.error is None)
+    return ResBulkCreate(
+        created=created, failed=len(results) - created, results=results
+    )
+
+
 @router.post(
     '/login',
     response_model=ResLoginSchema,
     responses=POST_CUSTOMER_STATUS_CODES,    # type: ignore
     status_code=status.HTTP_200_OK,
+    dependencies=[Depends(bulkhead("auth"))],
 )
 async def login(
         data: ReqLoginSchema,
@@ -74,6 +109,40 @@ async def login(
     return await controllers.customers.login(db, data, redis_db)
 
 
+@router.post(
+    '/refresh',
+    response_model=ResRefreshSchema,
+    status_code=status.HTTP_200_OK,
+)
+async def refresh(
+        authorize: AuthJWT = Depends(),
+        _oauth2_schema: str = Depends(oauth2_scheme),
+        redis_db: Redis = Depends(get_redis_db)):
+    return await controllers.customers.refresh(authorize, redis_db)
+
+
+@router.post(
+    '/logout',
+    status_code=status.HTTP_204_NO_CONTENT,
+    response_class=Response,
+)
+async def logout(
+        raw_jwt: dict = Depends(depend_customer_access_token),
+        redis_db: Redis = Depends(get_redis_db)):
+    await controllers.customers.logout(redis_db, raw_jwt)
+
+
+@router.post(
+    '/logout-all',
+    status_code=status.HTTP_204_NO_CONTENT,
+    response_class=Response,
+)
+async def logout_all(
+        raw_jwt: dict = Depends(depend_customer_access_token),
+        redis_db: Redis = Depends(get_redis_db)):
+    await controllers.customers.logout_all(redis_db, raw_jwt)
+
+
 @router.get(
     '',
     response_model=List[CustomerObj],
@@ -81,11 +150,83 @@ async def login(
     status_code=status.HTTP_200_OK,
 )
 async def get_customers(
+    request: Request,
+    paging: CursorPaginationParams = Depends(),
     authorize: AuthJWT = Depends(depend_customer_access_token),
-    db: AsyncSession = Depends(create_session)
+    db: AsyncSession = Depends(create_read_session)
 ):
     logger.info('Get customers')
-    return await controllers.customers.get_customers(db)
+    page = await controllers.customers.get_customers(
+        db, limit=paging.size, cursor=paging.cursor
+    )
+    return Response(
+        content=field_plan(CustomerObj).dumps(page.records),
+        media_type="application/json",
+        headers=CursorPaginationResponseHeaders(
+            url=request.url.components, size=paging.size,
+            cursor=paging.cursor, next_cursor=page.next_cursor
+        ).headers(),
+    )
+
+
+@router.get(
+    '/export',
+    responses=GET_CUSTOMERS_STATUS_CODES,    # type: ignore
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+)
+async def export_customers(
+    export_format: Literal['ndjson', 'csv'] = Query(
+        'ndjson', alias='format'),
+    authorize: AuthJWT = Depends(depend_customer_access_token),
+    db: AsyncSession = Depends(create_read_session)
+):
+    logger.info(f'Export customers as {export_format}')
+    partitions = controllers.customers.stream_customers(
+        db, yield_per=config.paging.EXPORT_YIELD_PER
+    )
+    if export_format == 'csv':
+        fieldnames = [c.key for c in controllers.customers.EXPORT_COLUMNS]
+        body, media_type = csv_chunks(partitions, fieldnames), CSV_MEDIA_TYPE
+    else:
+        body = customer_ndjson_chunks(partitions)
+        media_type = NDJSON_MEDIA_TYPE
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={
+            'Content-Disposition':
+                f'attachment; filename="customers.{export_format}"'
+        },
+    )
+
+
+@router.get(
+    '/paged',
+    response_model=List[CustomerObj],
+    responses=GET_CUSTOMERS_STATUS_CODES,    # type: ignore
+    status_code=status.HTTP_200_OK,
+)
+async def get_customers_paged(
+    request: Request,
+    paging: PaginationParams = Depends(),
+    authorize: AuthJWT = Depends(depend_customer_access_token),
+    db: AsyncSession = Depends(create_read_session)
+):
+    """Page-number listing with X-Total-Count and X-Page-Count headers,
+    counted according to COUNT_STRATEGY."""
+    logger.info('Get customers by page')
+    page = await controllers.customers.get_customers_page(
+        db, page=paging.page, size=paging.size
+    )
+    return Response(
+        content=field_plan(CustomerObj).dumps(page.records),
+        media_type="application/json",
+        headers=PaginationResponseHeaders(
+            url=request.url.components, page=paging.page, size=paging.size,
+            total=page.total, has_next=page.has_next
+        ).headers(),
+    )
 
 
 @router.get(
@@ -96,6 +237,30 @@ async def get_customers(
 )
 async def get_customer_by_device_id(
         device_id: int,
-        db: AsyncSession = Depends(create_session)):
+        request: Request,
+        paging: CursorPaginationParams = Depends(),
+        db: AsyncSession = Depends(create_cached_read_session)):
     logger.info('Get customers')
-    return await controllers.customers.get_customers_by_device_id(db, device_id)    # noqa: E501
+
+    async def load_page() -> CachedPage:
+        page = await controllers.customers.get_customers_by_device_id(
+            db, device_id, limit=paging.size, cursor=paging.cursor
+        )
+        return CachedPage(
+            body=field_plan(CustomerObj).dumps(page.records),
+            next_cursor=page.next_cursor,
+        )
+
+    page = await response_cache.read_through(
+        device_customers_namespace(device_id),
+        page_field(paging.size, paging.cursor),
+        load_page,
+    )
+    return Response(
+        content=page.body,
+        media_type="application/json",
+        headers=CursorPaginationResponseHeaders(
+            url=request.url.components, size=paging.size,
+            cursor=paging.cursor, next_cursor=page.next_cursor
+        ).headers(),
+    )
@@ -1,15 +1,25 @@
 import logging
 
 from typing import List
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Request, Response, status
+from pydantic import conlist
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import controllers
-from app.database.depends import create_session
-from app.schemas import DeviceSchema, DeviceObj
+from app.database.depends import create_cached_read_session, create_session
+from app.config import config
+from app.schemas import (
+    DeviceSchema, DeviceObj, ReqDeviceStatusUpdate, ResDeviceStatusUpdate
+)
+from app.utils.cache import (
+    DEVICES_NAMESPACE, CachedPage, page_field, response_cache
+)
+from app.utils.serialization import field_plan
 
-# from .custom_types import PaginationParams, PaginationResponseHeaders
+from .custom_types import (
+    CursorPaginationParams, CursorPaginationResponseHeaders
+)
 
 logger = logging.getLogger("__main__")
 
@@ -54,6 +64,41 @@ async def create_device(
     return await controllers.devices.create_device(db, data)
 
 
+@router.post(
+    '/bulk',
+    response_model=List[DeviceObj],
+    responses=POST_DEVICE_STATUS_CODES,    # type: ignore
+    status_code=status.HTTP_201_CREATED,
+)
+async def bulk_create_devices(
+        data: conlist(   # type: ignore
+            DeviceSchema, min_items=1,
+            max_items=config.bulk.BULK_MAX_RECORDS),
+        db: AsyncSession = Depends(create_session)):
+    logger.info(f'Creating {len(data)} devices')
+    return await controllers.devices.bulk_create_devices(db, data)
+
+
+@router.patch(
+    '/status',
+    response_model=ResDeviceStatusUpdate,
+    responses=PATCH_DEVICE_STATUS_CODES,    # type: ignore
+    status_code=status.HTTP_200_OK,
+)
+async def update_devices_status(
+        data: ReqDeviceStatusUpdate,
+        db: AsyncSession = Depends(create_session)):
+    logger.info(f'Updating status of {len(data.ids)} devices')
+    updated = await controllers.devices.update_devices_status(
+        db, data.ids, is_active=data.is_active, is_delete=data.is_delete
+    )
+    found = {device.id for device in updated}
+    return ResDeviceStatusUpdate(
+        updated=updated,
+        missing=[id_ for id_ in data.ids if id_ not in found],
+    )
+
+
 @router.get(
     '',
     response_model=List[DeviceObj],
@@ -61,6 +106,28 @@ async def create_device(
     status_code=status.HTTP_200_OK,
 )
 async def get_devices(
-        db: AsyncSession = Depends(create_session)):
+        request: Request,
+        paging: CursorPaginationParams = Depends(),
+        db: AsyncSession = Depends(create_cached_read_session)):
     logger.info(f'Get devices')
-    return await controllers.devices.get_devices(db)
+
+    async def load_page() -> CachedPage:
+        page = await controllers.devices.get_devices(
+            db, limit=paging.size, cursor=paging.cursor
+        )
+        return CachedPage(
+            body=field_plan(DeviceObj).dumps(page.records),
+            next_cursor=page.next_cursor,
+        )
+
+    page = await response_cache.read_through(
+        DEVICES_NAMESPACE, page_field(paging.size, paging.cursor), load_page
+    )
+    return Response(
+        content=page.body,
+        media_type="application/json",
+        headers=CursorPaginationResponseHeaders(
+            url=request.url.components, size=paging.size,
+            cursor=paging.cursor, next_cursor=page.next_cursor
+        ).headers(),
+    )
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from app.resources import get_resources, pools
+from app.utils.metrics import observe_pools, render_metrics
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["metrics"]
+)
+
+
+@router.get("", include_in_schema=False)
+async def metrics():
+    observe_pools(pools())
+    # Passed as a header: media_type would get a second charset appended.
+    return Response(
+        content=render_metrics(),
+        headers={"Content-Type": CONTENT_TYPE_LATEST}
+    )
+
+
+# Worker internals, for operators: served next to /metrics, outside the
+# public API prefix and schema.
+@router.get("/password-hash", include_in_schema=False)
+async def password_hash_stats():
+    return get_resources().hash_pool.stats()
+
+
+@router.get("/db-pool", include_in_schema=False)
+async def db_pool_stats():
+    return get_resources().pool_stats()
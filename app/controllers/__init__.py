@@ -1 +1,3 @@
-from . import custom_types, customers, devices   # noqa: F401
+from . import (  # noqa: F401
+    custom_types, helpers, projections, customers, devices
+)
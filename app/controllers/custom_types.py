@@ -14,13 +14,26 @@ class PagedResultSet(Generic[T]):
 
     offset: int
     count: int = field(init=False)
-    total: int
+    total: Optional[int]
     records: Sequence[T]
+    has_next: bool = False
 
     def __post_init__(self) -> None:
         self.count = len(self.records)
 
 
+@dataclass
+class CursorResultSet(Generic[T]):
+    """Keyset page of results
+
+    ``next_cursor`` is an opaque token for the following page, or None
+    when this is the last one.
+    """
+
+    records: Sequence[T]
+    next_cursor: Optional[str] = None
+
+
 class ItemDoesntExist(Exception):
     def __init__(self, type_: str, id_: Optional[UUID] = None):
         self.id_ = id_
@@ -1,25 +1,88 @@
 import logging
-from typing import List
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
 
 from fastapi_jwt_auth import AuthJWT
 
-from sqlalchemy import select
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
+from app.controllers.custom_types import CursorResultSet, PagedResultSet
+from app.controllers.helpers import (
+    KeysetQuery, OffsetQuery, invalidate_count_cache, paginate_keyset,
+    paginate_offset
+)
+from app.controllers.devices import (
+    DEVICE_PROJECTION, device_exists, existing_device_ids
+)
+from app.controllers.projections import Projection
 from app.database.models import Customer, Devices
-from app.schemas import CustomerSchema, ReqLoginSchema, ResLoginSchema
+from app.config import config
+from app.schemas import (
+    BulkItemResult, CustomerObj, CustomerSchema, ReqLoginSchema,
+    ResLoginSchema, ResRefreshSchema
+)
 from app.exceptions.configure_exceptions import (
-    ItemDoesNotExist, CustomerNotFound
+    ItemDoesNotExist, CustomerNotFound, RecordNotCreated
 )
 
+from app.utils.cache import device_customers_namespace, response_cache
 from app.utils.auth import (
-    PasswordHandle, customer_claims, create_auth_tokens
+    PasswordHandle, customer_claims, create_auth_tokens,
+    refresh_access_token, revoke_all_sessions, revoke_session,
+    verify_refresh_token
 )
 
 
 logger = logging.getLogger("__main__")
 
+EXPORT_COLUMNS = (
+    Customer.id, Customer.email, Customer.phone, Customer.prefix,
+    Customer.first_name, Customer.last_name, Customer.gender,
+    Customer.birth_date, Customer.address, Customer.weight, Customer.height,
+    Customer.group, Customer.device_id, Customer.created, Customer.modified,
+    Devices.is_active.label("device_is_active"),
+    Devices.is_delete.label("device_is_delete"),
+)
+
+CUSTOMER_PROJECTION = Projection(
+    CustomerObj, Customer, device=DEVICE_PROJECTION
+)
+
+# Hot queries, built once; see KeysetQuery.
+CUSTOMERS_PAGE = KeysetQuery(
+    CUSTOMER_PROJECTION.select(), Customer.id, CUSTOMER_PROJECTION.build
+)
+DEVICE_CUSTOMERS_PAGE = KeysetQuery(
+    CUSTOMER_PROJECTION.select().where(
+        Customer.device_id == bindparam("device_id")),
+    Customer.id,
+    CUSTOMER_PROJECTION.build,
+)
+CUSTOMERS_BY_ID = OffsetQuery(
+    CUSTOMER_PROJECTION.select().order_by(Customer.id),
+    Customer.__tablename__,
+    CUSTOMER_PROJECTION.build,
+    count_stmt=select(Customer.id),
+)
+# Only what login needs, so no ORM entity or device is loaded.
+CUSTOMER_LOGIN = select(
+    Customer.id, Customer.password, Customer.phone,
+    Customer.first_name, Customer.last_name,
+).where(Customer.email == bindparam("email"))
+# Ids for a bulk batch, drawn from the id column's sequence so that every
+# row is inserted with a known id.
+NEXT_CUSTOMER_IDS = select(
+    func.nextval(func.pg_get_serial_sequence(Customer.__tablename__, "id"))
+).select_from(func.generate_series(1, bindparam("count")))
+INSERT_CUSTOMERS = insert(Customer)
+UPDATE_PASSWORD = update(Customer).where(
+    Customer.id == bindparam("customer_id")
+).values(password=bindparam("new_password")).execution_options(
+    synchronize_session=False
+)
+
 
 async def create_customer(
         db: AsyncSession, data: CustomerSchema) -> Customer:
@@ -32,57 +95,184 @@ async def create_customer(
     Returns:
         Customer: created customer
     """
-    if data.device_id is not None:
-        stmt = select(Devices).filter(Devices.id == data.device_id)
-        result = await db.execute(stmt)
-        if result.first() is None:
-            raise ItemDoesNotExist("Device", data.device_id)
+    if data.device_id is not None and \
+            not await device_exists(db, data.device_id, on_primary=True):
+        raise ItemDoesNotExist("Device", data.device_id)
     password_handle = PasswordHandle()
-    hash_password = password_handle.get_password_hash(data.password)
+    hash_password = await password_handle.get_password_hash(data.password)
     data.password = hash_password
     model = Customer(**data.dict())
     db.add(model)
     await db.commit()   # type: ignore
+    await invalidate_count_cache(Customer.__tablename__)
+    if model.device_id is not None:
+        await response_cache.invalidate(
+            device_customers_namespace(model.device_id))
     return model
 
 
-async def get_customers(db: AsyncSession) -> List[Customer]:
-    """Get customers
+async def bulk_create_customers(
+        db: AsyncSession, records: Sequence[CustomerSchema]
+) -> List[BulkItemResult]:
+    """Create many customers in a single transaction
+
+    All referenced devices are checked with one query, passwords are hashed
+    on the worker pool in parallel and rows are written with multi-row
+    ``INSERT`` statements of ``BULK_INSERT_BATCH_SIZE`` rows. Ids are drawn
+    from the sequence before each batch and assigned by position. A batch
+    the database rejects is retried row by row, so only the failing
+    records are reported and the others are still created.
+
+    Args:
+        db (AsyncSession): database session
+        records (Sequence[CustomerSchema]): input customer data
+
+    Returns:
+        List[BulkItemResult]: per-record id or error, in input order
+    """
+    device_ids = {r.device_id for r in records if r.device_id is not None}
+    existing_devices = await existing_device_ids(
+        db, device_ids, on_primary=True)
+
+    results = [BulkItemResult(index=i) for i in range(len(records))]
+    valid = []
+    for index, record in enumerate(records):
+        if record.device_id is None or record.device_id in existing_devices:
+            valid.append(index)
+        else:
+            results[index].error = str(
+                ItemDoesNotExist("Device", record.device_id))
+
+    password_handle = PasswordHandle()
+    hashes = await password_handle.get_password_hashes(
+        [records[i].password for i in valid]
+    )
+    rows = [
+        {**records[i].dict(), "password": hash_password}
+        for i, hash_password in zip(valid, hashes)
+    ]
+
+    batch_size = config.bulk.BULK_INSERT_BATCH_SIZE
+    created: List[Dict[str, Any]] = []
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        indices = valid[start:start + batch_size]
+        ids = await db.execute(NEXT_CUSTOMER_IDS, {"count": len(batch)})
+        for row, id_ in zip(batch, ids.scalars().all()):
+            row["id"] = id_
+        if await _insert_customers(db, batch):
+            created.extend(batch)
+            for index, row in zip(indices, batch):
+                results[index].id = row["id"]
+            continue
+        for index, row in zip(indices, batch):
+            if await _insert_customers(db, [row]):
+                created.append(row)
+                results[index].id = row["id"]
+            else:
+                results[index].error = str(RecordNotCreated("Customer"))
+    await db.commit()   # type: ignore
+
+    if created:
+        await invalidate_count_cache(Customer.__tablename__)
+    created_device_ids = {row["device_id"] for row in created} - {None}
+    if created_device_ids:
+        await response_cache.invalidate(
+            *(device_customers_namespace(i) for i in created_device_ids))
+    return results
+
+
+async def _insert_customers(
+        db: AsyncSession, rows: List[Dict[str, Any]]) -> bool:
+    """Insert ``rows`` in a savepoint; False when the database rejects
+    them, leaving the transaction usable."""
+    try:
+        async with db.begin_nested():
+            await db.execute(INSERT_CUSTOMERS.values(rows))
+    except DBAPIError as exc:
+        logger.warning(f"Bulk insert of {len(rows)} customers failed: {exc}")
+        return False
+    return True
+
+
+async def get_customers(
+    db: AsyncSession, limit: int, cursor: Optional[str] = None
+) -> CursorResultSet:
+    """Get a page of customers
+
+    Args:
+        db (Session): database session
+        limit (int): page size
+        cursor (Optional[str]): cursor returned with the previous page
+
+    Returns:
+        CursorResultSet: Customers page, as CustomerObj-shaped rows
+    """
+    return await paginate_keyset(db, CUSTOMERS_PAGE, limit, cursor)
+
+
+async def get_customers_page(
+    db: AsyncSession, page: int, size: int
+) -> PagedResultSet:
+    """Get a page-number page of customers and their total count
+
+    The total comes from ``PagingConfig.COUNT_STRATEGY``; deep pages cost
+    an OFFSET scan, so prefer :func:`get_customers` when no total is
+    needed.
 
     Args:
         db (Session): database session
+        page (int): page number, from 1
+        size (int): page size
 
     Returns:
-        List[Customer]: Customers List
+        PagedResultSet: Customers page, as CustomerObj-shaped rows
     """
-    stmt = select(Customer).options(selectinload(Customer.device))
-    result = await db.execute(stmt)
-    customers = result.scalars().all()
-    return customers
+    return await paginate_offset(db, CUSTOMERS_BY_ID, page, size)
 
 
 async def get_customers_by_device_id(
-    db: AsyncSession, device_id: int
-) -> List[Customer]:
-    """Get customers by device_id
+    db: AsyncSession, device_id: int, limit: int, cursor: Optional[str] = None
+) -> CursorResultSet:
+    """Get a page of customers by device_id
 
     Args:
         db (Session): database session
+        device_id (int): device id
+        limit (int): page size
+        cursor (Optional[str]): cursor returned with the previous page
 
     Returns:
-        List[Customer]: Customers List
+        CursorResultSet: Customers page, as CustomerObj-shaped rows
+    """
+    if device_id is not None and not await device_exists(db, device_id):
+        raise ItemDoesNotExist("Device", device_id)
+    return await paginate_keyset(
+        db, DEVICE_CUSTOMERS_PAGE, limit, cursor, device_id=device_id
+    )
+
+
+async def stream_customers(
+    db: AsyncSession, yield_per: int
+) -> AsyncIterator[Sequence[Row]]:
+    """Stream every customer joined with its device
+
+    Rows are read from a server-side cursor ``yield_per`` at a time as
+    plain column tuples, so memory stays flat whatever the table size.
+
+    Args:
+        db (AsyncSession): database session
+        yield_per (int): rows fetched per round trip
+
+    Yields:
+        Sequence[Row]: partitions of export rows
     """
-    if device_id is not None:
-        stmt = select(Devices).filter(Devices.id == device_id)
-        result = await db.execute(stmt)
-        if result.first() is None:
-            raise ItemDoesNotExist("Device", device_id)
-    stmt = select(Customer).options(
-        selectinload(Customer.device)
-    ).filter(Customer.device_id == device_id)      # type: ignore
-    result = await db.execute(stmt)
-    customers = result.scalars().all()
-    return customers
+    stmt = select(*EXPORT_COLUMNS).outerjoin(
+        Customer.device
+    ).order_by(Customer.id).execution_options(max_row_buffer=yield_per)
+    result = await db.stream(stmt)
+    async for partition in result.partitions(yield_per):
+        yield partition
 
 
 async def login(
@@ -97,18 +287,23 @@ async def login(
     Returns:
         ResLoginSchema: Token
     """
-    stmt = select(Customer).options(
-        selectinload(Customer.device)
-    ).filter(Customer.email == data.email)      # type: ignore
-    result = await db.execute(stmt)
-    customer = result.scalars().first()
+    result = await db.execute(CUSTOMER_LOGIN, {"email": data.email})
+    customer = result.first()
+    # Give the auth bulkhead's connection back while the password hashes.
+    await db.close()
     if customer is None:
         raise CustomerNotFound()
     password_handle = PasswordHandle()
-    password_handle.verify_password(
+    new_hash = await password_handle.verify_password(
         plain_password=data.password,
         hashed_password=customer.password
     )
+    if new_hash is not None:
+        await db.execute(
+            UPDATE_PASSWORD,
+            {"customer_id": customer.id, "new_password": new_hash}
+        )
+        await db.commit()   # type: ignore
     claims = customer_claims(
         email=data.email,
         phone=customer.phone,
@@ -117,7 +312,7 @@ async def login(
         customer_id=customer.id
     )
     authorize = AuthJWT()
-    access_token, refresh_token = create_auth_tokens(
+    access_token, refresh_token = await create_auth_tokens(
         authorize=authorize,
         subject="customer",
         redis_db=redis_db,
@@ -126,3 +321,47 @@ async def login(
     return ResLoginSchema(
         access_token=access_token, refresh_token=refresh_token
     )
+
+
+async def refresh(authorize: AuthJWT, redis_db) -> ResRefreshSchema:
+    """Refresh
+
+    Args:
+        authorize (AuthJWT): request carrying the refresh token
+        redis_db (Redis): redis connection
+
+    Returns:
+        ResRefreshSchema: new access token, plus a new refresh token when
+            rotation is enabled
+    """
+    raw_jwt = verify_refresh_token(authorize, "customer")
+    access_token, refresh_token = await refresh_access_token(
+        authorize=authorize,
+        redis_db=redis_db,
+        raw_jwt=raw_jwt,
+        claims=customer_claims(**raw_jwt),
+        rotate=config.jwt.refresh_token_rotate
+    )
+    return ResRefreshSchema(
+        access_token=access_token, refresh_token=refresh_token
+    )
+
+
+async def logout(redis_db, raw_jwt) -> None:
+    """Logout the session the token belongs to
+
+    Args:
+        redis_db (Redis): redis connection
+        raw_jwt (Dict): claims of the authenticated access token
+    """
+    await revoke_session(redis_db, raw_jwt)
+
+
+async def logout_all(redis_db, raw_jwt) -> None:
+    """Logout every session of the token's customer
+
+    Args:
+        redis_db (Redis): redis connection
+        raw_jwt (Dict): claims of the authenticated access token
+    """
+    await revoke_all_sessions(redis_db, raw_jwt)
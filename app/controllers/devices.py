@@ -1,15 +1,98 @@
 import logging
-from typing import List
+from typing import Dict, List, Optional, Sequence, Set
 
-from sqlalchemy import func, select
+from sqlalchemy import any_, bindparam, func, insert, select, update
+from sqlalchemy.dialects import postgresql as pg
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.controllers.custom_types import CursorResultSet
+from app.controllers.helpers import (
+    KeysetQuery, invalidate_count_cache, paginate_keyset
+)
+from app.controllers.projections import Projection
+from app.config import config
 from app.database.models import Devices
-from app.schemas import DeviceSchema
+from app.schemas import DeviceObj, DeviceSchema
+from app.utils.cache import (
+    DEVICES_NAMESPACE, device_customers_namespace, response_cache
+)
+from app.utils.invalidation import invalidation_bus
+from app.utils.local_cache import TTLCache
 
 
 logger = logging.getLogger("__main__")
 
+DEVICE_EXISTS_TOPIC = "device_exists"
+
+# Per-worker device existence, including negative results.
+device_exists_cache = TTLCache(
+    "device_exists",
+    maxsize=config.local_cache.LOCAL_CACHE_MAXSIZE,
+    ttl=config.local_cache.LOCAL_CACHE_TTL,
+)
+invalidation_bus.register(
+    DEVICE_EXISTS_TOPIC,
+    lambda keys: device_exists_cache.delete(*(int(k) for k in keys)),
+)
+
+
+# Hot queries, built once; see KeysetQuery. ``= ANY(:ids)`` renders the
+# same SQL for any number of ids, unlike an expanding IN.
+DEVICE_PROJECTION = Projection(DeviceObj, Devices)
+DEVICES_PAGE = KeysetQuery(
+    DEVICE_PROJECTION.select(), Devices.id, DEVICE_PROJECTION.build
+)
+EXISTING_DEVICE_IDS = select(Devices.id).where(
+    Devices.id == any_(bindparam("ids", type_=pg.ARRAY(pg.INTEGER())))
+)
+
+
+def _cache_device_exists(device_id: int, exists: bool) -> None:
+    ttl = None if exists else config.local_cache.LOCAL_CACHE_NEGATIVE_TTL
+    device_exists_cache.set(device_id, exists, ttl=ttl)
+
+
+async def existing_device_ids(
+    db: AsyncSession, device_ids: Set[int], on_primary: bool = False
+) -> Set[int]:
+    """Return which of ``device_ids`` exist
+
+    Answers from the per-worker cache where possible and checks the rest
+    with a single query. Negative answers may have been cached from a
+    lagging replica, so write paths pass ``on_primary`` to check those
+    again on their primary session instead of rejecting a device that was
+    just created.
+
+    Args:
+        db (AsyncSession): database session
+        device_ids (Set[int]): device ids to check
+        on_primary (bool): ``db`` is on the primary; skip cached negatives
+
+    Returns:
+        Set[int]: ids of existing devices
+    """
+    existing, unknown = set(), set()
+    for device_id in device_ids:
+        cached = device_exists_cache.get(device_id)
+        if cached:
+            existing.add(device_id)
+        elif cached is None or on_primary:
+            unknown.add(device_id)
+
+    if unknown:
+        result = await db.execute(EXISTING_DEVICE_IDS, {"ids": list(unknown)})
+        found = set(result.scalars().all())
+        for device_id in unknown:
+            _cache_device_exists(device_id, device_id in found)
+        existing |= found
+    return existing
+
+
+async def device_exists(
+        db: AsyncSession, device_id: int, on_primary: bool = False) -> bool:
+    return device_id in await existing_device_ids(
+        db, {device_id}, on_primary=on_primary)
+
 
 async def create_device(
         db: AsyncSession, data: DeviceSchema) -> Devices:
@@ -25,19 +108,97 @@ async def create_device(
     model = Devices(**data.dict())
     db.add(model)
     await db.commit()   # type: ignore
+    await invalidate_count_cache(Devices.__tablename__)
+    await response_cache.invalidate(DEVICES_NAMESPACE)
+    await invalidation_bus.publish(DEVICE_EXISTS_TOPIC, model.id)
     return model
 
 
-async def get_devices(db: AsyncSession) -> List[Devices]:
-    """Get devices
+async def bulk_create_devices(
+        db: AsyncSession, records: Sequence[DeviceSchema]) -> List[DeviceObj]:
+    """Register many devices with multi-row ``INSERT ... RETURNING``
+    statements in a single transaction
 
     Args:
-        session (Session): database session
+        db (AsyncSession): database session
+        records (Sequence[DeviceSchema]): input device data
 
     Returns:
-        List[Devices]: Devices List
+        List[DeviceObj]: created devices, in input order
     """
-    stmt = select(Devices)      # type: ignore
+    rows = [record.dict() for record in records]
+    devices: List[DeviceObj] = []
+
+    batch_size = config.bulk.BULK_INSERT_BATCH_SIZE
+    for start in range(0, len(rows), batch_size):
+        stmt = insert(Devices).values(
+            rows[start:start + batch_size]
+        ).returning(Devices.id, Devices.is_active, Devices.is_delete)
+        result = await db.execute(stmt)
+        devices.extend(DeviceObj.from_orm(row) for row in result.all())
+    await db.commit()   # type: ignore
+
+    await invalidate_count_cache(Devices.__tablename__)
+    await response_cache.invalidate(DEVICES_NAMESPACE)
+    await invalidation_bus.publish(
+        DEVICE_EXISTS_TOPIC, *(d.id for d in devices))
+    return devices
+
+
+async def update_devices_status(
+    db: AsyncSession,
+    ids: Sequence[int],
+    is_active: Optional[bool] = None,
+    is_delete: Optional[bool] = None,
+) -> List[DeviceObj]:
+    """Set is_active/is_delete on many devices with one
+    ``UPDATE ... WHERE id = ANY(:ids) RETURNING`` statement
+
+    Args:
+        db (AsyncSession): database session
+        ids (Sequence[int]): device ids
+        is_active (Optional[bool]): new is_active, unchanged if None
+        is_delete (Optional[bool]): new is_delete, unchanged if None
+
+    Returns:
+        List[DeviceObj]: updated devices
+    """
+    values: Dict[str, bool] = {}
+    if is_active is not None:
+        values["is_active"] = is_active
+    if is_delete is not None:
+        values["is_delete"] = is_delete
+
+    ids_param = bindparam("ids", list(ids), type_=pg.ARRAY(pg.INTEGER()))
+    stmt = update(Devices).where(
+        Devices.id == any_(ids_param)
+    ).values(**values).returning(
+        Devices.id, Devices.is_active, Devices.is_delete
+    ).execution_options(synchronize_session=False)
     result = await db.execute(stmt)
-    devices = result.scalars().all()
-    return devices
\ No newline at end of file
+    devices = [DeviceObj.from_orm(row) for row in result.all()]
+    await db.commit()   # type: ignore
+    # Customer listings embed their device, so those pages go stale too.
+    await response_cache.invalidate(
+        DEVICES_NAMESPACE,
+        *(device_customers_namespace(d.id) for d in devices)
+    )
+    await invalidation_bus.publish(
+        DEVICE_EXISTS_TOPIC, *(d.id for d in devices))
+    return devices
+
+
+async def get_devices(
+    db: AsyncSession, limit: int, cursor: Optional[str] = None
+) -> CursorResultSet:
+    """Get a page of devices
+
+    Args:
+        session (Session): database session
+        limit (int): page size
+        cursor (Optional[str]): cursor returned with the previous page
+
+    Returns:
+        CursorResultSet: Devices page, as DeviceObj-shaped rows
+    """
+    return await paginate_keyset(db, DEVICES_PAGE, limit, cursor)
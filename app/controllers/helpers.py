@@ -0,0 +1,244 @@
+import base64
+import binascii
+import hashlib
+import json
+import time
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import bindparam, func, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlalchemy.sql import Select
+
+from app.config import config
+from app.exceptions.configure_exceptions import InvalidCursor
+from app.utils.get_db import get_redis_db
+
+from .custom_types import CursorResultSet, PagedResultSet
+
+
+def encode_cursor(**keys: int) -> str:
+    """Encode keyset values into an opaque, url-safe cursor."""
+    raw = json.dumps(keys, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> Dict[str, int]:
+    """Decode a cursor produced by :func:`encode_cursor`."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        keys = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, ValueError):
+        raise InvalidCursor()
+    if not isinstance(keys, dict) or not all(
+        isinstance(v, int) and not isinstance(v, bool) for v in keys.values()
+    ):
+        raise InvalidCursor()
+    return keys
+
+
+class KeysetQuery:
+    """Page statements of ``stmt`` ordered by the unique column ``key``.
+
+    Built once at import with bound parameters (``:limit``, ``:after`` and
+    any of ``stmt``'s own), so requests skip rebuilding the statement and
+    its cache key, and always send the same SQL text, which keeps asyncpg's
+    per-connection prepared statement cache warm.
+
+    Without ``build`` pages hold the first column of each row (the ORM
+    entity), otherwise ``build(row)`` of every row.
+    """
+
+    def __init__(
+        self,
+        stmt: Select,
+        key: InstrumentedAttribute,
+        build: Optional[Callable[[Any], Any]] = None,
+    ):
+        self.key = key
+        self.build = build
+        self.first_page = stmt.order_by(key).limit(bindparam("limit"))
+        self.next_page = stmt.where(
+            key > bindparam("after")
+        ).order_by(key).limit(bindparam("limit"))
+
+
+async def paginate_keyset(
+    db: AsyncSession,
+    query: KeysetQuery,
+    limit: int,
+    cursor: Optional[str] = None,
+    **params: Any,
+) -> CursorResultSet:
+    """Fetch one page of ``query``, binding ``params`` to its statement.
+
+    Seeks past the last key of the previous page instead of using OFFSET,
+    so every page costs the same index range scan.
+    """
+    key = query.key
+    stmt, params = query.first_page, {**params, "limit": limit + 1}
+    if cursor is not None:
+        keys = decode_cursor(cursor)
+        if key.key not in keys:
+            raise InvalidCursor()
+        stmt, params["after"] = query.next_page, keys[key.key]
+
+    result = await db.execute(stmt, params)
+    if query.build is None:
+        records = result.scalars().all()
+    else:
+        records = [query.build(row) for row in result]
+
+    next_cursor = None
+    if len(records) > limit:
+        records = records[:limit]
+        next_cursor = encode_cursor(**{key.key: getattr(records[-1], key.key)})
+    return CursorResultSet(records=records, next_cursor=next_cursor)
+
+
+# Renders ``:name`` placeholders, which ``text()`` binds by name.
+NAMED_PARAMS_DIALECT = postgresql.dialect(paramstyle="named")
+
+
+class CountQuery:
+    """Total row count of ``stmt`` by each ``PagingConfig.COUNT_STRATEGY``.
+
+    Built once per statement shape, like :class:`KeysetQuery`: the COUNT(*)
+    statement, the EXPLAIN text and the cached count's Redis field are
+    prepared here, so requests only bind parameters. ``count_key`` names
+    the table whose inserts invalidate cached counts.
+    """
+
+    def __init__(self, stmt: Select, count_key: str):
+        self.count_key = count_key
+        stmt = stmt.order_by(None)
+        self.exact = select(func.count()).select_from(stmt.subquery())
+        compiled = stmt.compile(dialect=NAMED_PARAMS_DIALECT)
+        self.explain = text(
+            f"EXPLAIN (FORMAT JSON) {compiled}"
+        ).bindparams(**compiled.params)
+        self.digest = hashlib.sha1(str(compiled).encode()).hexdigest()
+
+    def field(self, params: Dict[str, Any]) -> str:
+        """Field of the count for ``params`` in the table's count hash."""
+        if not params:
+            return self.digest
+        raw = json.dumps(params, sort_keys=True, default=str)
+        return hashlib.sha1(f"{self.digest}:{raw}".encode()).hexdigest()
+
+
+def count_cache_key(count_key: str) -> str:
+    return f"/{config.redis.redis_prefix}/count/{count_key}"
+
+
+async def exact_count(
+        db: AsyncSession, query: CountQuery, params: Dict[str, Any]) -> int:
+    result = await db.execute(query.exact, params)
+    return result.scalar_one()
+
+
+async def estimated_count(
+        db: AsyncSession, query: CountQuery, params: Dict[str, Any]) -> int:
+    """Row estimate from the planner (pg_class.reltuples/statistics)."""
+    result = await db.execute(query.explain, params)
+    plan = result.scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def cached_count(
+        db: AsyncSession, query: CountQuery, params: Dict[str, Any]) -> int:
+    """Exact count cached in a per-table Redis hash.
+
+    Each field stores ``<count>:<timestamp>`` so entries age out after
+    COUNT_CACHE_TTL even though the hash itself is shared; inserts drop
+    the whole hash via :func:`invalidate_count_cache`.
+    """
+    key = count_cache_key(query.count_key)
+    field = query.field(params)
+    ttl = config.paging.COUNT_CACHE_TTL
+
+    cached = await get_redis_db().hget(key, field)
+    if cached is not None:
+        if isinstance(cached, bytes):
+            cached = cached.decode()
+        cached_total, stored_at = cached.split(":")
+        if time.time() - float(stored_at) < ttl:
+            return int(cached_total)
+
+    total = await exact_count(db, query, params)
+    async with get_redis_db().pipeline(transaction=False) as pipe:
+        pipe.hset(key, field, f"{total}:{time.time()}")
+        pipe.expire(key, ttl)
+        await pipe.execute()
+    return total
+
+
+async def invalidate_count_cache(*count_keys: str) -> None:
+    if config.paging.COUNT_STRATEGY != "cached":
+        return
+    await get_redis_db().delete(*(count_cache_key(k) for k in count_keys))
+
+
+async def count_rows(
+        db: AsyncSession, query: CountQuery, **params: Any) -> Optional[int]:
+    """Total rows of ``query`` according to ``PagingConfig.COUNT_STRATEGY``,
+    binding ``params`` to its statement."""
+    strategy = config.paging.COUNT_STRATEGY
+    if strategy == "exact":
+        return await exact_count(db, query, params)
+    if strategy == "estimated":
+        return await estimated_count(db, query, params)
+    if strategy == "cached":
+        return await cached_count(db, query, params)
+    return None
+
+
+class OffsetQuery:
+    """Page-number pages of ``stmt`` and their total, built once like
+    :class:`KeysetQuery`.
+
+    Pages are bound with ``:limit`` and ``:offset``; ``count_stmt``, when
+    given, is counted instead of ``stmt`` (eg. without its joins). Rows are
+    built like :class:`KeysetQuery` pages.
+    """
+
+    def __init__(
+        self,
+        stmt: Select,
+        count_key: str,
+        build: Optional[Callable[[Any], Any]] = None,
+        count_stmt: Optional[Select] = None,
+    ):
+        self.build = build
+        self.page = stmt.limit(bindparam("limit")).offset(bindparam("offset"))
+        self.count = CountQuery(
+            stmt if count_stmt is None else count_stmt, count_key)
+
+
+async def paginate_offset(
+    db: AsyncSession,
+    query: OffsetQuery,
+    page: int,
+    size: int,
+    **params: Any,
+) -> PagedResultSet:
+    """Fetch a page-number page of ``query`` and its total row count,
+    binding ``params`` to its statements."""
+    offset = (page - 1) * size
+    result = await db.execute(
+        query.page, {**params, "limit": size + 1, "offset": offset})
+    if query.build is None:
+        records = result.scalars().all()
+    else:
+        records = [query.build(row) for row in result]
+
+    total = await count_rows(db, query.count, **params)
+    return PagedResultSet(
+        offset=offset,
+        total=total,
+        records=records[:size],
+        has_next=len(records) > size,
+    )
@@ -0,0 +1,54 @@
+from typing import Any, Dict, Sequence, Type
+
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.sql import Select
+
+
+class Projection:
+    """Read-only, column-projected view of ``entity`` shaped like ``model``.
+
+    Only the columns the schema has are selected; ``nested`` maps a
+    relationship field to the projection of its target, loaded through a
+    LEFT JOIN. Result tuples become ``__slots__`` objects carrying the
+    schema's fields, so reads never hydrate ORM entities, touch the
+    session's identity map or load unused columns.
+    """
+
+    def __init__(
+        self,
+        model: Type[BaseModel],
+        entity: Any,
+        **nested: "Projection",
+    ):
+        if any(p.nested for p in nested.values()):
+            raise ValueError("Nested projections cannot nest further")
+        self.entity = entity
+        self.nested: Dict[str, Projection] = nested
+        self.fields = tuple(model.__fields__)
+        self.own_fields = tuple(f for f in self.fields if f not in nested)
+        self.columns = [getattr(entity, f) for f in self.own_fields]
+        # A NULL primary key in a joined projection means no related row.
+        self.pk_index = next(
+            i for i, c in enumerate(self.columns) if c.primary_key)
+        self.row_class = type(
+            f"{model.__name__}Row", (), {"__slots__": self.fields})
+
+    def select(self) -> Select:
+        stmt = select(*self.columns)
+        for name, projection in self.nested.items():
+            stmt = stmt.add_columns(*projection.columns).outerjoin(
+                getattr(self.entity, name))
+        return stmt
+
+    def build(self, row: Sequence[Any]) -> Any:
+        obj: Any = object.__new__(self.row_class)
+        for name, value in zip(self.own_fields, row):
+            setattr(obj, name, value)
+        start = len(self.own_fields)
+        for name, projection in self.nested.items():
+            values = row[start:start + len(projection.columns)]
+            start += len(projection.columns)
+            setattr(obj, name, projection.build(values)
+                    if values[projection.pk_index] is not None else None)
+        return obj
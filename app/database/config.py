@@ -1,13 +1,22 @@
+import time
+from typing import Any, Dict
+
 from sqlalchemy import MetaData as _MetaData
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession
 from sqlalchemy.orm import (
     Mapped, sessionmaker, declarative_base,
     declarative_mixin, declared_attr, Session
 )
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.config import config as settings
+
+from app.utils.metrics import DB_POOL_WAIT
 
-from app.config import DatabaseServiceConfig
+from .query_stats import track_queries
 
-config = DatabaseServiceConfig()
+config = settings.db
 
 
 MetaData = _MetaData(
@@ -40,16 +49,65 @@ class BaseMixin:
             setattr(self, key, value)
 
 
-async_engine: AsyncEngine = create_async_engine(
-    config.ASYNC_DATABASE_URI,
-    **config.SQLALCHEMY_ENGINE_OPTIONS,
-    future=True
-)
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool recording how long each checkout waits for a
+    connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._wait_count = 0
+        self._wait_seconds = 0.0
+        self._wait_seconds_max = 0.0
+        self._timeouts = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self._timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self._wait_count += 1
+            self._wait_seconds += waited
+            self._wait_seconds_max = max(self._wait_seconds_max, waited)
+            DB_POOL_WAIT.labels(self._orig_logging_name).observe(waited)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pool_size": self.size(),
+            "max_overflow": self._max_overflow,
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": self.overflow(),
+            "checkouts": self._wait_count,
+            "timeouts": self._timeouts,
+            "wait_seconds_total": self._wait_seconds,
+            "wait_seconds_avg": self._wait_seconds / self._wait_count
+            if self._wait_count else 0.0,
+            "wait_seconds_max": self._wait_seconds_max,
+        }
+
+
+def build_engine(url, name: str, options: Dict[str, Any]) -> AsyncEngine:
+    engine = create_async_engine(
+        url,
+        **options,
+        pool_logging_name=name,
+        poolclass=TimedAsyncQueuePool,
+        connect_args=config.ASYNC_CONNECT_ARGS,
+        future=True
+    )
+    track_queries(engine)
+    return engine
+
+
+DEFAULT_BULKHEAD = "writes"
 
 sess = sessionmaker(     # type: ignore
     autocommit=False,
     autoflush=False,
-    bind=async_engine,
     future=True,
     class_=AsyncSession,
     expire_on_commit=False,
@@ -1,10 +1,105 @@
+import time
 from typing import AsyncGenerator
 
+from fastapi import Request, Response
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from .config import sess
+from app.resources import get_resources
 
+from .config import config, sess
 
-async def create_session() -> AsyncGenerator[AsyncSession, None]:
-    async with sess() as session:
+PRIMARY_PIN_COOKIE = "db_primary_until"
+READ_METHODS = ("GET", "HEAD")
+
+
+def bulkhead(name: str):
+    """Route dependency sending the route's sessions to the ``name``
+    primary pool, eg. ``dependencies=[Depends(bulkhead("auth"))]``."""
+    if name not in config.DATABASE_BULKHEADS:
+        raise ValueError(f"Unknown bulkhead: {name}")
+
+    def use_bulkhead(request: Request) -> None:
+        request.state.bulkhead = name
+
+    return use_bulkhead
+
+
+def route_bulkhead(request: Request) -> str:
+    return getattr(request.state, "bulkhead", None) or (
+        "reads" if request.method in READ_METHODS else "writes")
+
+
+def pin_to_primary(response: Response) -> None:
+    window = config.DATABASE_READ_YOUR_WRITES_SECONDS
+    response.set_cookie(
+        PRIMARY_PIN_COOKIE, str(int(time.time()) + window),
+        max_age=window, httponly=True, samesite="lax"
+    )
+
+
+def pinned_to_primary(request: Request) -> bool:
+    try:
+        return float(request.cookies[PRIMARY_PIN_COOKIE]) > time.time()
+    except (KeyError, ValueError):
+        return False
+
+
+async def create_session(
+        request: Request,
+        response: Response) -> AsyncGenerator[AsyncSession, None]:
+    resources = get_resources()
+    primary = resources.bulkheads[route_bulkhead(request)]
+    async with sess(bind=primary) as session:
+        if resources.replicas:
+            # Keep the client's next reads on the primary until replicas
+            # have caught up with this write.
+            event.listen(
+                session.sync_session, "after_commit",
+                lambda _: pin_to_primary(response)
+            )
+        yield session
+
+
+async def create_read_session(
+        request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """Session for read-only work, on a read replica when one is healthy
+    and the client has not just written.
+
+    "Just written" is only known from the cookie set by
+    :func:`pin_to_primary`: clients that drop cookies (most API clients
+    without a cookie jar) are not pinned and may not see their own writes
+    for as long as replicas lag. Checks that guard a write must not rely
+    on this session; write paths use :func:`create_session`, which is
+    always on the primary. Reads whose results are cached use
+    :func:`create_cached_read_session`.
+    """
+    resources = get_resources()
+    replicas = resources.replicas
+    engine = None if pinned_to_primary(request) else replicas.choose()
+    primary = resources.bulkheads[route_bulkhead(request)]
+    async with sess(bind=engine or primary) as session:
+        try:
+            yield session
+        except OSError:
+            # Failed connects surface as OSError rather than DBAPI errors,
+            # which the replica's handle_error listener never sees.
+            if engine is not None:
+                replicas.eject(engine)
+            raise
+
+
+async def create_cached_read_session(
+        request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """Session for reads whose results go into the response cache, always
+    on the primary.
+
+    A write invalidates the cache as soon as it commits, before replicas
+    have it. A page loaded from a lagging replica right after would be
+    cached under the new generation and served to every client until it
+    expires. Cache hits open no connection, so only misses reach the
+    primary.
+    """
+    primary = get_resources().bulkheads[route_bulkhead(request)]
+    async with sess(bind=primary) as session:
         yield session
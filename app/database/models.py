@@ -1,6 +1,8 @@
 from datetime import datetime
 
-from sqlalchemy import Column, ForeignKey, Text, DateTime, INTEGER, BOOLEAN
+from sqlalchemy import (
+    Column, ForeignKey, Index, Text, DateTime, INTEGER, BOOLEAN
+)
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects import postgresql as pg
 
@@ -8,10 +10,15 @@ from .config import BaseMixin, BaseModel
 
 
 class Customer(BaseMixin, BaseModel):    # type: ignore
+    __table_args__ = (
+        # Serves device lookups and keyset pages of a device's customers.
+        Index("ix_customer_device_id", "device_id", "id"),
+    )
+
     id = Column(
         'id', pg.INTEGER(),
         autoincrement=True, nullable=False, primary_key=True)
-    email = Column(Text, nullable=False)
+    email = Column(Text, nullable=False, index=True)
     password = Column(Text, nullable=False)
     phone = Column(Text, nullable=False)
     prefix = Column(Text, nullable=False)
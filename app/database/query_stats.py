@@ -0,0 +1,53 @@
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette_context import context
+
+QUERY_STATS_KEY = "query_stats"
+
+
+@dataclass
+class QueryStats:
+    """Statements executed and time spent in the database for a request."""
+
+    count: int = 0
+    seconds: float = 0.0
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.seconds * 1000:.2f};desc="{self.count} queries"'
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    if not context.exists():
+        return None
+    return context.get(QUERY_STATS_KEY)
+
+
+def _before_cursor_execute(
+        conn, cursor, statement, parameters, exec_context, executemany):
+    exec_context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(
+        conn, cursor, statement, parameters, exec_context, executemany):
+    stats = current_query_stats()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += time.perf_counter() - exec_context._query_started
+
+
+def track_queries(engine: AsyncEngine) -> None:
+    """Count statements and DB time of ``engine`` into the request context.
+
+    Safe to call more than once for the same engine.
+    """
+    sync_engine = engine.sync_engine
+    for name, listener in (
+        ("before_cursor_execute", _before_cursor_execute),
+        ("after_cursor_execute", _after_cursor_execute),
+    ):
+        if not event.contains(sync_engine, name, listener):
+            event.listen(sync_engine, name, listener)
@@ -0,0 +1,54 @@
+import itertools
+import logging
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import ExceptionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger("__main__")
+
+
+class ReplicaSet:
+    """Round-robin over read replica engines, skipping unhealthy ones.
+
+    A replica whose connection fails or drops is ejected for
+    ``eject_seconds``. While every replica is ejected ``choose`` returns
+    None and reads go to the primary.
+    """
+
+    def __init__(self, engines: List[AsyncEngine], eject_seconds: float):
+        self.engines = engines
+        self.eject_seconds = eject_seconds
+        self._order = itertools.cycle(engines)
+        self._ejected_until: Dict[AsyncEngine, float] = {}
+        for engine in engines:
+            self.watch(engine)
+
+    def __bool__(self) -> bool:
+        return bool(self.engines)
+
+    def choose(self) -> Optional[AsyncEngine]:
+        now = time.monotonic()
+        for _ in range(len(self.engines)):
+            engine = next(self._order)
+            if self._ejected_until.get(engine, 0.0) <= now:
+                return engine
+        return None
+
+    def eject(self, engine: AsyncEngine) -> None:
+        self._ejected_until[engine] = time.monotonic() + self.eject_seconds
+        logger.warning(
+            f"Ejected read replica {engine.url!r} "
+            f"for {self.eject_seconds}s"
+        )
+
+    def watch(self, engine: AsyncEngine) -> None:
+        """Eject ``engine`` on connection errors."""
+
+        def on_error(context: ExceptionContext) -> None:
+            if context.is_disconnect or context.connection is None:
+                self.eject(engine)
+
+        event.listen(engine.sync_engine, "handle_error", on_error)
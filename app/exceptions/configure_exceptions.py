@@ -7,6 +7,19 @@ class ItemDoesNotExist(Exception):
         return f"{self.item_name} with id: {self.item_id} does not exist"
 
 
+class RecordNotCreated(Exception):
+    def __init__(self, item_name: str):
+        self.item_name = item_name
+
+    def __str__(self):
+        return f"{self.item_name} could not be created"
+
+
+class InvalidCursor(Exception):
+    def __str__(self):
+        return "Invalid Pagination Cursor"
+
+
 class InvalidPassword(Exception):
     def __str__(self):
         return "Invalid Password"
@@ -28,3 +41,11 @@ class ServerErrorException(Exception):
 
     def __str__(self):
         return self.message
+
+
+class ServiceUnavailableException(Exception):
+    def __init__(self, message: str):
+        self.message = message
+
+    def __str__(self):
+        return self.message
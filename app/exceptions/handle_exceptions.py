@@ -2,7 +2,9 @@ import logging
 from fastapi import FastAPI, Request, status
 from fastapi.responses import ORJSONResponse
 
-from app.exceptions.configure_exceptions import InvalidPassword
+from app.exceptions.configure_exceptions import (
+    InvalidPassword, ServiceUnavailableException
+)
 
 logger = logging.getLogger("__main__")
 
@@ -33,3 +35,17 @@ def configure_exceptions_handlers(app: FastAPI):
                 "content": exc.__str__()
             }
         )
+
+    @app.exception_handler(ServiceUnavailableException)
+    async def handle_unavailable_exception(
+        request: Request, exc: ServiceUnavailableException
+    ) -> ORJSONResponse:
+        logger.warning(exc)
+        return ORJSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={"Retry-After": "1"},
+            content={
+                "status": False,
+                "content": exc.__str__()
+            }
+        )
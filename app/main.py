@@ -1,17 +1,17 @@
 # import os
+from functools import lru_cache
 
-from fastapi import FastAPI
-from fastapi.responses import UJSONResponse
-from fastapi.openapi.utils import get_openapi
-from fastapi.openapi.docs import get_swagger_ui_html
+from fastapi import FastAPI, Request
+from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html
 
-from starlette.responses import HTMLResponse
+from starlette.responses import HTMLResponse, Response
 
 from .__version__ import __version__
 from .config import config
 from .exceptions.handle_exceptions import configure_exceptions_handlers
 from .middlewares import configure_middlewares
 from .configure_logging import configure_logging
+from .utils.openapi import OpenAPIArtifact
 
 from app.apis import configure_routes
 
@@ -22,9 +22,10 @@ app = FastAPI(
     description=config.DESCRIPTION,
     version=__version__,
     debug=config.DEBUG,
-    openapi_url=f"{config.OPENAPI_PREFIX}/openapi.json",
+    # Schema and docs routes are declared below, to serve the cached schema.
+    openapi_url=None,
     docs_url=None,
-    redoc_url=f"{config.OPENAPI_PREFIX}/doc",
+    redoc_url=None,
 )
 # Update and set up configs
 configure_logging(log_level=config.LOG_LEVEL)
@@ -42,13 +43,48 @@ configure_routes(app)
 # )
 
 
+@app.on_event("startup")
+def open_resources():
+    from .resources import get_resources
+
+    get_resources().start()
+
+
+@app.on_event("startup")
+def configure_password_hashing():
+    from .utils.hashing import configure_pwd_context
+
+    configure_pwd_context()
+
+
+@app.on_event("startup")
+def start_invalidation_listener():
+    from .utils.invalidation import invalidation_bus
+
+    invalidation_bus.start()
+
+
+@app.on_event("shutdown")
+async def stop_invalidation_listener():
+    from .utils.invalidation import invalidation_bus
+
+    await invalidation_bus.stop()
+
+
+@app.on_event("shutdown")
+async def dispose_resources():
+    from .resources import close_resources
+
+    await close_resources()
+
+
 # For local testing
 # @app.on_event('startup')
 # async def create_database():
-#     from .database.config import async_engine
 #     from .database.models import BaseModel
+#     from .resources import get_resources
 
-#     async with async_engine.begin() as conn:
+#     async with get_resources().async_engine.begin() as conn:
 #         # Change `create_all` to `drop_all` to drop all tables
 #         await conn.run_sync(BaseModel.metadata.create_all)
 
@@ -61,17 +97,26 @@ async def swagger_html():
         title=app.title)
 
 
-@app.router.get(
-    f"{config.OPENAPI_PREFIX}/swagger.json",
-    include_in_schema=False, response_class=UJSONResponse
-)
-async def custom_openapi_json():
-    return custom_openapi()
-
-
-def custom_openapi():
-    openapi_schema = get_openapi(
-        title=app.title, version=app.version,
-        description=config.DESCRIPTION, routes=app.routes
-    )
-    return openapi_schema
+@app.router.get(f"{config.OPENAPI_PREFIX}/doc", include_in_schema=False,
+                response_class=HTMLResponse)
+async def redoc_html():
+    return get_redoc_html(
+        openapi_url=f"{config.OPENAPI_PREFIX}/openapi.json",
+        title=f"{app.title} - ReDoc")
+
+
+@app.router.get(f"{config.OPENAPI_PREFIX}/openapi.json",
+                include_in_schema=False, response_class=Response)
+@app.router.get(f"{config.OPENAPI_PREFIX}/swagger.json",
+                include_in_schema=False, response_class=Response)
+async def custom_openapi_json(request: Request):
+    return openapi_artifact().response(request)
+
+
+@lru_cache()
+def openapi_artifact() -> OpenAPIArtifact:
+    """The schema of this process, built once (after every route has been
+    registered) or loaded from the prebuilt artifact."""
+    if config.OPENAPI_ARTIFACT:
+        return OpenAPIArtifact.load(config.OPENAPI_ARTIFACT)
+    return OpenAPIArtifact.from_app(app)
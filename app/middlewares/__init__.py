@@ -4,8 +4,25 @@ from starlette_context.middleware import RawContextMiddleware
 from starlette_context.plugins.request_id import RequestIdPlugin
 from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware  # type: ignore  # noqa: E501
 
+from app.config import config
+
+from .compression import CompressionMiddleware
+from .metrics import PrometheusMiddleware
+from .query_stats import QueryStatsMiddleware
+
 
 def configure_middlewares(app: FastAPI) -> None:
+    settings = config.compression
+    if settings.COMPRESSION_ENABLED:
+        # Innermost, so the latency metrics include compression time.
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+            gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+            brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+            media_types=settings.COMPRESSION_MEDIA_TYPES,
+        )
+    app.add_middleware(PrometheusMiddleware)
     app.add_middleware(ProxyHeadersMiddleware)
     app.add_middleware(
         CORSMiddleware,
@@ -14,4 +31,6 @@ def configure_middlewares(app: FastAPI) -> None:
         allow_headers=["*"],
         allow_credentials=True,
     )
+    # Added before RawContextMiddleware so it runs inside the request context.
+    app.add_middleware(QueryStatsMiddleware)
     app.add_middleware(RawContextMiddleware, plugins=(RequestIdPlugin(),))
@@ -0,0 +1,181 @@
+import zlib
+from typing import Dict, Iterable, List, Optional, Union
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.content_encoding import preferred_encoding
+
+try:
+    import brotli
+except ImportError:     # optional dependency
+    brotli = None
+
+UNCOMPRESSED_STATUSES = (204, 304)
+
+
+class GzipCompressor:
+    def __init__(self, level: int) -> None:
+        # wbits=31: zlib stream with a gzip header and trailer.
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress a chunk and flush it, so it reaches the client now."""
+        return self._z.compress(data) + self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._z.flush(zlib.Z_FINISH)
+
+
+class BrotliCompressor:
+    def __init__(self, quality: int) -> None:
+        self._c = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.process(data) + self._c.flush()
+
+    def finish(self) -> bytes:
+        return self._c.finish()
+
+
+Compressor = Union[GzipCompressor, BrotliCompressor]
+
+
+class CompressionMiddleware:
+    """Compress response bodies with brotli (when installed) or gzip,
+    whichever the client prefers.
+
+    Only bodies of an allowed media type and of at least ``minimum_size``
+    bytes are compressed; responses that are already encoded, HEAD
+    requests and empty statuses pass through. Streamed bodies are
+    compressed chunk by chunk as they are produced, flushing after each
+    one, and only the first ``minimum_size`` bytes are held back to decide
+    whether compressing is worth it.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        media_types: Iterable[str] = ("application/json",),
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels: Dict[str, int] = {"gzip": gzip_level}
+        if brotli is not None:
+            self.levels["br"] = brotli_quality
+        # Preferred first when the client weighs them equally.
+        self.encodings = tuple(e for e in ("br", "gzip") if e in self.levels)
+        self.media_types = frozenset(media_types)
+
+    def compressor(self, encoding: str) -> Compressor:
+        if encoding == "br":
+            return BrotliCompressor(self.levels[encoding])
+        return GzipCompressor(self.levels[encoding])
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = preferred_encoding(
+            Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send_compressed)
+
+
+class CompressionResponder:
+    """``send`` wrapper for one response."""
+
+    def __init__(
+        self, middleware: CompressionMiddleware, encoding: str, send: Send
+    ) -> None:
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        self.start: Optional[Message] = None
+        self.held: List[bytes] = []
+        self.held_size = 0
+        self.compressor: Optional[Compressor] = None
+        self.passthrough = False
+
+    def compressible(self, message: Message) -> bool:
+        headers = Headers(raw=message["headers"])
+        media_type = headers.get("content-type", "").split(";")[0].strip()
+        content_length = headers.get("content-length")
+        return (
+            message["status"] not in UNCOMPRESSED_STATUSES
+            and "content-encoding" not in headers
+            and media_type.lower() in self.middleware.media_types
+            and not (content_length is not None
+                     and int(content_length) < self.middleware.minimum_size)
+        )
+
+    async def send_compressed(self, message: Message) -> None:
+        if self.passthrough:
+            await self.send(message)
+        elif message["type"] == "http.response.start":
+            if self.compressible(message):
+                self.start = message
+            else:
+                self.passthrough = True
+                await self.send(message)
+        elif message["type"] != "http.response.body" or self.start is None:
+            await self.send(message)
+        elif self.compressor is not None:
+            await self.send_chunk(self.compressor, message)
+        else:
+            await self.hold(self.start, message)
+
+    async def hold(self, start: Message, message: Message) -> None:
+        """Buffer the start of the body until it is long enough to be
+        worth compressing, or complete."""
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        self.held.append(body)
+        self.held_size += len(body)
+        if self.held_size < self.middleware.minimum_size:
+            if more_body:
+                return
+            # Complete and too small: send it as it is.
+            self.passthrough = True
+            await self.send(start)
+            await self.send({
+                "type": "http.response.body", "body": b"".join(self.held)})
+            return
+
+        held = b"".join(self.held)
+        self.held = []
+        compressor = self.compressor = self.middleware.compressor(
+            self.encoding)
+        headers = MutableHeaders(scope=start)
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("etag")
+        if etag is not None and not etag.startswith("W/"):
+            # The encoded body is a different representation.
+            headers["ETag"] = f"W/{etag}"
+        if more_body:
+            del headers["Content-Length"]
+            await self.send(start)
+            await self.send_chunk(compressor, {**message, "body": held})
+        else:
+            compressed = compressor.compress(held) + compressor.finish()
+            headers["Content-Length"] = str(len(compressed))
+            await self.send(start)
+            await self.send({"type": "http.response.body", "body": compressed})
+
+    async def send_chunk(
+        self, compressor: Compressor, message: Message
+    ) -> None:
+        body = compressor.compress(message.get("body", b""))
+        more_body = message.get("more_body", False)
+        if not more_body:
+            body += compressor.finish()
+        await self.send({
+            "type": "http.response.body", "body": body, "more_body": more_body
+        })
@@ -0,0 +1,73 @@
+import logging
+import time
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from starlette_context import context
+from starlette_context.header_keys import HeaderKeys
+
+from app.database.query_stats import QUERY_STATS_KEY, QueryStats
+
+logger = logging.getLogger("__main__")
+
+
+class QueryStatsMiddleware:
+    """Report per-request query count and DB time.
+
+    Adds a ``Server-Timing`` header to responses sent in one piece and logs
+    one line per request, tagged with the request id, once the body is
+    sent. Streamed bodies run their queries after the headers are out, so
+    they get no header (it would read 0 queries); only the log line has
+    their totals. Must run inside ``RawContextMiddleware``.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not context.exists():
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        context[QUERY_STATS_KEY] = stats
+        started = time.perf_counter()
+        status_code = 500
+        start: Optional[Message] = None
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code, start
+            if message["type"] == "http.response.start":
+                # Held until the first body chunk shows whether the body
+                # is complete.
+                status_code = message["status"]
+                start = message
+                return
+            if start is not None:
+                if not message.get("more_body", False):
+                    elapsed = (time.perf_counter() - started) * 1000
+                    MutableHeaders(scope=start).append(
+                        "Server-Timing",
+                        f"{stats.server_timing()}, app;dur={elapsed:.2f}"
+                    )
+                await send(start)
+                start = None
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            logger.info(
+                f"request_id={context.get(HeaderKeys.request_id)} "
+                f"method={scope['method']} path={scope['path']} "
+                f"status={status_code} db_queries={stats.count} "
+                f"db_ms={stats.seconds * 1000:.2f} duration_ms={elapsed:.2f}",
+                extra={
+                    "request_id": context.get(HeaderKeys.request_id),
+                    "db_queries": stats.count,
+                    "db_ms": stats.seconds * 1000,
+                    "duration_ms": elapsed,
+                },
+            )
@@ -0,0 +1,150 @@
+import logging
+import os
+from functools import cached_property
+from typing import Any, Dict, Optional
+
+from redis.asyncio import ConnectionPool, Redis
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import Config, get_config
+from app.database.config import (
+    DEFAULT_BULKHEAD, TimedAsyncQueuePool, build_engine
+)
+from app.database.replicas import ReplicaSet
+from app.utils.hashing import HashWorkerPool
+from app.utils.redis import InstrumentedRedis
+
+logger = logging.getLogger("__main__")
+
+
+class Resources:
+    """Connection pools and workers shared by the requests of a worker.
+
+    Each one is created on first use, so importing the application (test
+    collection, scripts, the gunicorn master) opens nothing; ``start``
+    creates them all on worker startup and ``dispose`` releases the ones
+    that exist on shutdown.
+    """
+
+    def __init__(self, settings: Config):
+        self.settings = settings
+
+    @cached_property
+    def bulkheads(self) -> Dict[str, AsyncEngine]:
+        db = self.settings.db
+        limits = db.BULKHEAD_LIMITS
+        engines = {
+            name: build_engine(
+                db.ASYNC_DATABASE_URI, f"primary-{name}",
+                db.bulkhead_engine_options(name)
+            )
+            for name in limits
+        }
+        shared = DEFAULT_BULKHEAD if DEFAULT_BULKHEAD in limits \
+            else max(limits, key=lambda name: sum(limits[name]))
+        for name in db.DATABASE_BULKHEADS:
+            if name not in engines:
+                logger.warning(
+                    f"No connection left for the {name} bulkhead; it "
+                    f"shares the {shared} pool"
+                )
+                engines[name] = engines[shared]
+        return engines
+
+    @property
+    def async_engine(self) -> AsyncEngine:
+        return self.bulkheads[DEFAULT_BULKHEAD]
+
+    @cached_property
+    def replicas(self) -> ReplicaSet:
+        db = self.settings.db
+        return ReplicaSet(
+            [
+                build_engine(url, f"replica-{i}", db.SQLALCHEMY_ENGINE_OPTIONS)
+                for i, url in enumerate(db.ASYNC_REPLICA_URIS)
+            ],
+            eject_seconds=db.DATABASE_REPLICA_EJECT_SECONDS,
+        )
+
+    @cached_property
+    def redis_pool(self) -> ConnectionPool:
+        return ConnectionPool(
+            host=self.settings.redis.redis_host,
+            port=self.settings.redis.redis_port,
+            max_connections=self.settings.redis.redis_max_connections,
+        )
+
+    @cached_property
+    def redis(self) -> Redis:
+        return InstrumentedRedis(connection_pool=self.redis_pool)
+
+    @cached_property
+    def hash_pool(self) -> HashWorkerPool:
+        return HashWorkerPool(
+            max_workers=self.settings.password_hash.PASSWORD_HASH_WORKERS,
+            max_queue=self.settings.password_hash.PASSWORD_HASH_QUEUE_SIZE,
+        )
+
+    def created(self, name: str) -> bool:
+        return name in self.__dict__
+
+    def start(self) -> None:
+        for name in ("bulkheads", "replicas", "redis", "hash_pool"):
+            getattr(self, name)
+
+    def pools(self) -> Dict[str, TimedAsyncQueuePool]:
+        engines = [*self.bulkheads.values(), *self.replicas.engines]
+        return {
+            engine.pool._orig_logging_name: engine.pool    # type: ignore
+            for engine in engines
+        }
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Live pool statistics of this worker process."""
+        db = self.settings.db
+        return {
+            "pid": os.getpid(),
+            "workers": db.WEB_CONCURRENCY,
+            "connection_budget": db.DATABASE_CONNECTION_BUDGET,
+            "pools": {
+                name: pool.stats() for name, pool in self.pools().items()
+            },
+        }
+
+    async def dispose(self) -> None:
+        if self.created("hash_pool"):
+            self.hash_pool.shutdown()
+        if self.created("redis_pool"):
+            await self.redis_pool.disconnect()
+        if self.created("replicas"):
+            for engine in self.replicas.engines:
+                await engine.dispose()
+        if self.created("bulkheads"):
+            for engine in set(self.bulkheads.values()):
+                await engine.dispose()
+
+
+_resources: Optional[Resources] = None
+
+
+def get_resources() -> Resources:
+    """The registry of this worker, created on first use."""
+    global _resources
+    if _resources is None:
+        _resources = Resources(get_config())
+    return _resources
+
+
+def pools() -> Dict[str, TimedAsyncQueuePool]:
+    """Pools of the registry, without creating it."""
+    if _resources is None or not _resources.created("bulkheads"):
+        return {}
+    return _resources.pools()
+
+
+async def close_resources() -> None:
+    """Dispose the registry; the next ``get_resources`` starts afresh."""
+    global _resources
+    resources, _resources = _resources, None
+    if resources is not None:
+        await resources.dispose()
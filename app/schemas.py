@@ -1,9 +1,11 @@
-from typing import Literal, Optional
+from typing import List, Literal, Optional
 from datetime import date
 import re
 
 from pydantic import (
-    BaseModel, NonNegativeInt, EmailStr, validator)
+    BaseModel, NonNegativeInt, EmailStr, conlist, validator)
+
+from app.config import config
 
 
 class DeviceSchema(BaseModel):
@@ -20,9 +22,29 @@ class DeviceObj(DeviceSchema):
     id: int
 
 
-class CustomerSchema(BaseModel):
+class ReqDeviceStatusUpdate(BaseModel):
+    ids: conlist(   # type: ignore
+        int, min_items=1, max_items=config.bulk.BULK_MAX_RECORDS)
+    is_active: Optional[bool]
+    is_delete: Optional[bool]
+
+    @validator("is_delete", always=True)
+    def status_required(cls, v, values):
+        if v is None and values.get("is_active") is None:
+            raise ValueError("is_active or is_delete is required.")
+        return v
+
+    class Config:
+        extra = 'forbid'
+
+
+class ResDeviceStatusUpdate(BaseModel):
+    updated: List[DeviceObj]
+    missing: List[int]
+
+
+class CustomerBase(BaseModel):
     email: EmailStr
-    password: str
     phone: str
     prefix: str
     first_name: str
@@ -48,7 +70,11 @@ class CustomerSchema(BaseModel):
         extra = 'forbid'
 
 
-class CustomerObj(CustomerSchema):
+class CustomerSchema(CustomerBase):
+    password: str
+
+
+class CustomerObj(CustomerBase):
     id: int
     device: Optional[DeviceObj]
 
@@ -57,6 +83,18 @@ class ResCreateCustomer(CustomerSchema):
     id: int
 
 
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class ResBulkCreate(BaseModel):
+    created: int
+    failed: int
+    results: List[BulkItemResult]
+
+
 class ReqLoginSchema(BaseModel):
     email: EmailStr
     password: str
@@ -65,3 +103,8 @@ class ReqLoginSchema(BaseModel):
 class ResLoginSchema(BaseModel):
     access_token: str
     refresh_token: str
+
+
+class ResRefreshSchema(BaseModel):
+    access_token: str
+    refresh_token: Optional[str] = None
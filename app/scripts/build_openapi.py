@@ -0,0 +1,36 @@
+"""Write the OpenAPI schema of the application to a file at build time.
+
+Point OPENAPI_ARTIFACT at the file and workers serve it as is, instead of
+building the schema from the routes:
+
+    python -m app.scripts.build_openapi [--output openapi.json]
+"""
+import argparse
+import logging
+
+from app.config import config
+
+logger = logging.getLogger("__main__")
+
+DEFAULT_OUTPUT = "openapi.json"
+
+
+def build(output: str) -> int:
+    """Write the schema to ``output``; returns its size in bytes."""
+    from app.main import app
+    from app.utils.openapi import OpenAPIArtifact
+
+    artifact = OpenAPIArtifact.from_app(app)
+    with open(output, "wb") as f:
+        f.write(artifact.body)
+    return len(artifact.body)
+
+
+if __name__ == "__main__":
+    # Logging is configured by app.main, which build() imports.
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--output", default=config.OPENAPI_ARTIFACT or DEFAULT_OUTPUT,
+        help="file to write the schema to")
+    output = parser.parse_args().output
+    logger.info(f"Wrote {build(output)} bytes of OpenAPI schema to {output}")
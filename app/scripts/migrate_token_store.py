@@ -0,0 +1,99 @@
+"""Move tokens from the legacy one-key-per-token layout into the
+per-customer token hashes of :class:`app.utils.token_store.TokenStore`.
+
+Run once while deploying the new token store, before traffic reaches it:
+
+    python -m app.scripts.migrate_token_store [--dry-run]
+
+Legacy refresh tokens were stored without an expiry; they get the
+configured refresh lifetime from the time of the migration.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import re
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from redis.asyncio import Redis
+
+from app.config import config
+from app.resources import close_resources, get_resources
+from app.utils.token_store import (
+    REFRESH_TOKEN_TYPE, TokenEntry, TokenStore
+)
+
+logger = logging.getLogger("__main__")
+
+SCAN_COUNT = 1000
+
+
+def legacy_key_pattern() -> "re.Pattern[str]":
+    return re.compile(
+        rf"^/{re.escape(config.redis.redis_prefix)}/auth/"
+        r"(?P<sub>[^/]+)/(?P<id>[^/]+)/(?P<type>[^/]+)_token/(?P<jti>[^/]+)$"
+    )
+
+
+async def migrate(redis: Redis, dry_run: bool = False) -> Tuple[int, int]:
+    """Migrate every legacy token key; returns (tokens, customers)."""
+    pattern = legacy_key_pattern()
+    match = f"/{config.redis.redis_prefix}/auth/*/*/*_token/*"
+    keys = [k.decode() async for k in redis.scan_iter(
+        match=match, count=SCAN_COUNT)]
+    keys = [k for k in keys if pattern.match(k)]
+    if not keys:
+        return 0, 0
+
+    async with redis.pipeline(transaction=False) as pipe:
+        for key in keys:
+            pipe.get(key)
+            pipe.ttl(key)
+        replies = await pipe.execute()
+
+    now = int(time.time())
+    by_store: Dict[str, List[TokenEntry]] = defaultdict(list)
+    for key, value, ttl in zip(keys, replies[::2], replies[1::2]):
+        if value is None:
+            continue
+        parts = pattern.match(key).groupdict()    # type: ignore
+        exp = now + ttl if ttl > 0 \
+            else now + config.jwt.refresh_token_lifetime
+        by_store[TokenStore.key(parts['sub'], parts['id'])].append(TokenEntry(
+            jti=parts['jti'], type=parts['type'], exp=exp,
+            refresh_jti=json.loads(value).get('jwt_refresh'),
+        ))
+
+    if not dry_run:
+        store = TokenStore(redis)
+        for store_key, entries in by_store.items():
+            await store.add(store_key, *entries)
+            if not any(e.type == REFRESH_TOKEN_TYPE for e in entries):
+                await redis.expireat(store_key, max(e.exp for e in entries))
+        for i in range(0, len(keys), SCAN_COUNT):
+            await redis.delete(*keys[i:i + SCAN_COUNT])
+
+    return sum(len(e) for e in by_store.values()), len(by_store)
+
+
+async def main(dry_run: bool) -> None:
+    try:
+        tokens, customers = await migrate(
+            get_resources().redis, dry_run=dry_run)
+    finally:
+        await close_resources()
+    logger.info(
+        f"{'Found' if dry_run else 'Migrated'} {tokens} tokens "
+        f"for {customers} customers"
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=config.LOG_LEVEL)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--dry-run", action="store_true",
+        help="only count the legacy keys, do not move them")
+    asyncio.run(main(parser.parse_args().dry_run))
@@ -1,33 +1,49 @@
-import json
 import logging
 import re
-from typing import Dict
-from redis import Redis
+import time
+from typing import Dict, List, Optional
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
 
 from fastapi import Depends
 from fastapi.security import HTTPBearer
 from fastapi_jwt_auth import AuthJWT
-from passlib.context import CryptContext
 from passlib.exc import UnknownHashError
 
 from app.exceptions.configure_exceptions import (
     InvalidPassword, WrongCredentialsException, ServerErrorException
 )
 from app.config import config
-from app.utils.jwt import redis_conn
+from app.resources import get_resources
+from app.utils import jwt  # noqa: F401  (loads the AuthJWT settings)
+from app.utils.get_db import get_redis_db
+from app.utils.hashing import pwd_context
+from app.utils.invalidation import invalidation_bus
+from app.utils.local_cache import TTLCache
+from app.utils.token_store import TokenEntry, TokenStore
 
 logger = logging.getLogger(__name__)
 oauth2_scheme = HTTPBearer(auto_error=False)
 
+REVOKED_TOKEN_TOPIC = "revoked_token"
+
+# Per-worker set of token JTIs already found in Redis, so most
+# authenticated requests skip the Redis round trip.
+token_cache = TTLCache(
+    "token",
+    maxsize=config.local_cache.TOKEN_CACHE_MAXSIZE,
+    ttl=config.local_cache.TOKEN_CACHE_TTL,
+)
+invalidation_bus.register(
+    REVOKED_TOKEN_TOPIC, lambda jtis: token_cache.delete(*jtis)
+)
+
 
 class PasswordHandle:
 
     @property
     def pwd_context(self):
-        return CryptContext(
-            schemes=["bcrypt"],
-            deprecated="auto"
-        )
+        return pwd_context
 
     @staticmethod
     def validate_password(password):
@@ -35,11 +51,11 @@ class PasswordHandle:
         if not re.match(regex_pattern, password):
             raise InvalidPassword("invalidPassword")
 
-    def verify_password(self, plain_password, hashed_password):
+    def _verify_password(self, plain_password, hashed_password):
         try:
-            verify = False
+            verify, new_hash = False, None
             if plain_password is not None and hashed_password is not None:
-                verify = self.pwd_context.verify(
+                verify, new_hash = self.pwd_context.verify_and_update(
                     secret=plain_password,
                     hash=hashed_password
                 )
@@ -47,64 +63,143 @@ class PasswordHandle:
             raise WrongCredentialsException("password")
         if not verify:
             raise WrongCredentialsException("password")
+        return new_hash
 
-    def get_password_hash(self, password):
+    def _get_password_hash(self, password):
         return self.pwd_context.hash(password)
 
+    async def verify_password(self, plain_password, hashed_password):
+        """Verify a password, returning a new hash if the stored one is
+        outdated (``needs_update``) and None otherwise."""
+        return await get_resources().hash_pool.run(
+            self._verify_password, plain_password, hashed_password
+        )
+
+    async def get_password_hash(self, password):
+        return await get_resources().hash_pool.run(
+            self._get_password_hash, password)
 
-def create_auth_tokens(
+    async def get_password_hashes(self, passwords):
+        return await get_resources().hash_pool.map(
+            self._get_password_hash, passwords)
+
+
+async def create_auth_tokens(
     authorize: AuthJWT, subject: str, redis_db: Redis, claims: Dict
 ):
     access_expires_time = config.jwt.authjwt_access_token_expires
     refresh_token = authorize.create_refresh_token(
         subject=subject,
         user_claims=claims,
-        expires_time=False
+        expires_time=config.jwt.authjwt_refresh_token_expires
     )
     access_token = authorize.create_access_token(
         subject=subject,
         user_claims=claims,
         expires_time=access_expires_time
     )
-    redis_login(authorize, redis_db, access_token, refresh_token)
+    await redis_login(authorize, redis_db, access_token, refresh_token)
     return access_token, refresh_token
 
 
-def refresh_access_token(authorize, redis_db, sub, claims):
-    auth_jwt = AuthJWT()
-    access_expires_time = config.jwt.authjwt_access_token_expires
-    access_token = auth_jwt.create_access_token(
-        subject=sub,
+async def refresh_access_token(
+    authorize: AuthJWT, redis_db: Redis, raw_jwt: Dict, claims: Dict,
+    rotate: bool = False
+):
+    """Issue an access token from the refresh token ``raw_jwt``; with
+    ``rotate`` a new refresh token replaces it. The refresh token is
+    checked and the new tokens recorded in a single round trip."""
+    access_token = authorize.create_access_token(
+        subject=raw_jwt['sub'],
         user_claims=claims,
-        expires_time=access_expires_time
-    )
-    redis_update_refresh_for_access_token(
-        authorize=auth_jwt,
-        access_expires_time=access_expires_time,
-        access_token=access_token,
-        refresh_jti=authorize['jti'],
-        redis_db=redis_db
+        expires_time=config.jwt.authjwt_access_token_expires
     )
-    return access_token
+    refresh_token = None
+    if rotate:
+        refresh_token = authorize.create_refresh_token(
+            subject=raw_jwt['sub'],
+            user_claims=claims,
+            expires_time=config.jwt.authjwt_refresh_token_expires
+        )
+    if not await redis_login(
+        authorize, redis_db, access_token, refresh_token,
+        current_refresh_jti=raw_jwt['jti']
+    ):
+        raise ServerErrorException("Wrong Token")
+    return access_token, refresh_token
+
+
+async def check_existing_jwt_token(raw_jwt):
+    if token_cache.get(raw_jwt['jti']):
+        return True
 
+    entry = await TokenStore(get_redis_db()).get(raw_jwt)
+    if entry is None:
+        return False
 
-def check_existing_jwt_token(raw_jwt):
-    entry = redis_conn.get(generate_key_auth_token(raw_jwt))
-    return entry is not None
+    ttl = config.local_cache.TOKEN_CACHE_TTL
+    if "exp" in raw_jwt:
+        ttl = min(ttl, raw_jwt["exp"] - time.time())
+    if ttl > 0:
+        token_cache.set(raw_jwt['jti'], True, ttl=ttl)
+    return True
 
 
-def verify_access_token(authorize: AuthJWT, sub: str):
+async def publish_revoked(jtis: List[str]):
+    """Evict revoked tokens from every worker's token cache.
+
+    The revocation is already stored when this runs, so a failure is only
+    logged: other workers then keep the tokens cached until
+    ``TOKEN_CACHE_TTL`` runs out.
+    """
+    if not jtis:
+        return
+    try:
+        await invalidation_bus.publish(REVOKED_TOKEN_TOPIC, *jtis)
+    except RedisError as e:
+        logger.warning(f"Revoked tokens not published: {e!r}")
+
+
+async def revoke_session(redis_db: Redis, raw_jwt: Dict):
+    try:
+        jtis = await TokenStore(redis_db).revoke_session(raw_jwt)
+    except Exception as e:
+        logger.error(e)
+        raise ServerErrorException("Redis Error")
+    await publish_revoked(jtis)
+
+
+async def revoke_all_sessions(redis_db: Redis, raw_jwt: Dict):
+    try:
+        jtis = await TokenStore(redis_db).revoke_all(raw_jwt)
+    except Exception as e:
+        logger.error(e)
+        raise ServerErrorException("Redis Error")
+    await publish_revoked(jtis)
+
+
+async def verify_access_token(authorize: AuthJWT, sub: str):
     try:
         authorize.jwt_required()
         raw_jwt = authorize.get_raw_jwt()
         if authorize.get_jwt_subject() == sub and \
-           check_existing_jwt_token(raw_jwt):
+           await check_existing_jwt_token(raw_jwt):
             return raw_jwt
     except Exception as e:
         logger.info(e)
     raise ServerErrorException("Wrong Token")
 
 
+def verify_refresh_token(authorize: AuthJWT, sub: str):
+    try:
+        authorize.jwt_refresh_token_required()
+        if authorize.get_jwt_subject() == sub:
+            return authorize.get_raw_jwt()
+    except Exception as e:
+        logger.info(e)
+    raise ServerErrorException("Wrong Token")
+
+
 def customer_claims(**kwargs):
     return {
         "email": kwargs.get('email', None),
@@ -115,67 +210,47 @@ def customer_claims(**kwargs):
     }
 
 
-def redis_login(
-    authorize: AuthJWT, redis_db: Redis, access_token=None, refresh_token=None
-):
-    try:
-        if access_token is not None:
-            data: Dict = {}
-            raw_jwt_access = authorize.get_raw_jwt(access_token)
-            if refresh_token is not None:
-                raw_jwt_refresh = authorize.get_raw_jwt(refresh_token)
-                redis_db.set(
-                    generate_key_auth_token(raw_jwt_refresh),
-                    json.dumps(data)
-                )
-                data['jwt_refresh'] = raw_jwt_refresh['jti']
-            if "exp" in raw_jwt_access:
-                redis_db.setex(
-                    generate_key_auth_token(raw_jwt_access),
-                    config.jwt.authjwt_access_token_expires,    # type: ignore
-                    json.dumps(data)
-                )
-            else:
-                redis_db.set(
-                    generate_key_auth_token(raw_jwt_access),
-                    json.dumps(data)
-                )
+def token_entry(raw_jwt: Dict, refresh_jti: Optional[str] = None):
+    exp = raw_jwt.get(
+        'exp', int(time.time()) + config.jwt.refresh_token_lifetime)
+    return TokenEntry(
+        jti=raw_jwt['jti'], type=raw_jwt['type'], exp=exp,
+        refresh_jti=refresh_jti
+    )
 
-    except Exception as e:
-        logger.error(e)
-        raise ServerErrorException("Redis Error")
 
+async def redis_login(
+    authorize: AuthJWT, redis_db: Redis, access_token: str,
+    refresh_token: Optional[str] = None,
+    current_refresh_jti: Optional[str] = None
+) -> bool:
+    """Record issued tokens in one atomic script call.
 
-def redis_update_refresh_for_access_token(
-    authorize: AuthJWT,
-    access_token: str,
-    access_expires_time: int,
-    refresh_jti: str,
-    redis_db: Redis
-):
+    When the tokens come from the refresh token ``current_refresh_jti``,
+    nothing is written unless it is still valid, and a new
+    ``refresh_token`` replaces it. Returns whether the tokens were written.
+    """
     try:
+        entries = []
+        refresh_jti = current_refresh_jti
         raw_jwt_access = authorize.get_raw_jwt(access_token)
-        data = {
-            'jwt_refresh': refresh_jti
-        }
-        redis_db.setex(
-            generate_key_auth_token(raw_jwt_access),
-            access_expires_time,
-            json.dumps(data)
+        if refresh_token is not None:
+            raw_jwt_refresh = authorize.get_raw_jwt(refresh_token)
+            refresh_jti = raw_jwt_refresh['jti']
+            entries.append(token_entry(raw_jwt_refresh))
+        entries.append(token_entry(raw_jwt_access, refresh_jti))
+        return await TokenStore(redis_db).add(
+            TokenStore.key_for(raw_jwt_access), *entries,
+            require=current_refresh_jti,
+            replace=refresh_token is not None
         )
     except Exception as e:
         logger.error(e)
-        raise ServerErrorException("Refresh Token Error")
+        raise ServerErrorException("Redis Error")
 
 
-def depend_customer_access_token(
+async def depend_customer_access_token(
     authorize: AuthJWT = Depends(),
     _oauth2_schema: str = Depends(oauth2_scheme)
 ):
-    return verify_access_token(authorize, "customer")
-
-
-def generate_key_auth_token(raw_jwt):
-    sub = raw_jwt['sub']
-    instance_id = raw_jwt[f"{sub}_id"]
-    return f"/{config.redis.redis_prefix}/auth/{sub}/{instance_id}/{raw_jwt['type']}_token/{raw_jwt['jti']}"    # noqa: E501
+    return await verify_access_token(authorize, "customer")
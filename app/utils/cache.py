@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional, Union
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.config import config
+from app.utils.get_db import get_redis_db
+
+logger = logging.getLogger("__main__")
+
+LOCK_POLL_INTERVAL = 0.05
+
+# KEYS[1]: namespace hash, KEYS[2]: its generation; ARGV: generation read
+# before loading ("" for none), field, page, ttl. Returns 0 without
+# writing when the namespace was invalidated since.
+SET_PAGE_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '') ~= ARGV[1] then
+    return 0
+end
+redis.call('HSET', KEYS[1], ARGV[2], ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return 1
+"""
+
+
+@dataclass
+class CachedPage:
+    """Pre-serialized JSON body of a listing page and its next cursor."""
+
+    body: bytes
+    next_cursor: Optional[str] = None
+
+    def dumps(self) -> bytes:
+        return f"{time.time()}:{self.next_cursor or ''}:".encode() + self.body
+
+    @classmethod
+    def loads(cls, raw: bytes) -> "CachedPage":
+        _, next_cursor, body = raw.split(b":", 2)
+        return cls(body=body, next_cursor=next_cursor.decode() or None)
+
+    @staticmethod
+    def stored_at(raw: bytes) -> float:
+        return float(raw.split(b":", 1)[0])
+
+
+class ResponseCache:
+    """Read-through cache of listing pages kept in Redis hashes.
+
+    Each namespace (eg. one device's customers) is one hash whose fields
+    are the page parameters, so a write drops every page of a namespace
+    with a single DEL. Fields carry their write time and age out after
+    ``ttl`` seconds. Invalidating also bumps the namespace's generation,
+    and a load only stores its page if the generation it started under is
+    still current, so a page read before a write never lands after it.
+
+    A cold field is loaded once: concurrent misses in this worker share
+    one in-flight load, and across workers a Redis lock lets a single
+    loader run while the others poll for its result. When Redis fails the
+    page is loaded uncached rather than failing the request.
+    Without ``redis`` the worker's shared client is used.
+    """
+
+    def __init__(
+        self,
+        ttl: int,
+        lock_timeout: float,
+        redis: Optional[Redis] = None,
+    ):
+        self._redis = redis
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self._inflight: Dict[str, "asyncio.Future[CachedPage]"] = {}
+
+    @property
+    def redis(self) -> Redis:
+        return self._redis if self._redis is not None else get_redis_db()
+
+    @staticmethod
+    def key(namespace: str) -> str:
+        return f"/{config.redis.redis_prefix}/cache/{namespace}"
+
+    @classmethod
+    def generation_key(cls, namespace: str) -> str:
+        return f"{cls.key(namespace)}/generation"
+
+    async def _get(self, namespace: str, field: str) -> Optional[CachedPage]:
+        raw = await self.redis.hget(self.key(namespace), field)
+        if isinstance(raw, str):
+            raw = raw.encode()
+        if raw is None or time.time() - CachedPage.stored_at(raw) >= self.ttl:
+            return None
+        return CachedPage.loads(raw)
+
+    async def _set(
+        self,
+        namespace: str,
+        field: str,
+        page: CachedPage,
+        generation: Union[bytes, str, None],
+    ) -> bool:
+        set_page = self.redis.register_script(SET_PAGE_SCRIPT)
+        return bool(await set_page(
+            keys=[self.key(namespace), self.generation_key(namespace)],
+            args=[generation or b"", field, page.dumps(), self.ttl],
+        ))
+
+    async def _wait(
+            self, namespace: str, field: str) -> Optional[CachedPage]:
+        """Poll for the page another worker is loading under the lock."""
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+            page = await self._get(namespace, field)
+            if page is not None:
+                return page
+        logger.warning(f"Cache lock on {namespace} {field} timed out")
+        return None
+
+    async def _unlock(self, lock_key: str, token: str) -> None:
+        try:
+            if await self.redis.get(lock_key) == token.encode():
+                await self.redis.delete(lock_key)
+        except RedisError:
+            pass    # the lock expires after lock_timeout anyway
+
+    async def _load(
+        self,
+        namespace: str,
+        field: str,
+        loader: Callable[[], Awaitable[CachedPage]],
+    ) -> CachedPage:
+        lock_key = f"{self.key(namespace)}/lock/{field}"
+        token = uuid.uuid4().hex
+        try:
+            generation = await self.redis.get(self.generation_key(namespace))
+            acquired = await self.redis.set(
+                lock_key, token, nx=True, px=int(self.lock_timeout * 1000))
+            if not acquired:
+                page = await self._wait(namespace, field)
+                if page is not None:
+                    return page
+        except RedisError as e:
+            logger.warning(f"Cache unavailable, loading uncached: {e!r}")
+            return await loader()
+
+        try:
+            page = await loader()
+            try:
+                await self._set(namespace, field, page, generation)
+            except RedisError as e:
+                logger.warning(f"Cache unavailable, page not stored: {e!r}")
+            return page
+        finally:
+            if acquired:
+                await self._unlock(lock_key, token)
+
+    async def read_through(
+        self,
+        namespace: str,
+        field: str,
+        loader: Callable[[], Awaitable[CachedPage]],
+    ) -> CachedPage:
+        try:
+            page = await self._get(namespace, field)
+        except RedisError as e:
+            logger.warning(f"Cache unavailable, loading uncached: {e!r}")
+            return await loader()
+        if page is not None:
+            return page
+
+        inflight_key = f"{namespace}/{field}"
+        if inflight_key in self._inflight:
+            return await asyncio.shield(self._inflight[inflight_key])
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[inflight_key] = future
+        try:
+            page = await self._load(namespace, field, loader)
+            future.set_result(page)
+            return page
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Waiters re-raise it; mark retrieved for the no-waiter case.
+            future.exception()
+            raise
+        finally:
+            del self._inflight[inflight_key]
+
+    async def invalidate(self, *namespaces: str) -> None:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(*(self.key(n) for n in namespaces))
+            for namespace in namespaces:
+                pipe.incr(self.generation_key(namespace))
+                # Outlives any load that could have read the old value.
+                pipe.expire(self.generation_key(namespace), self.ttl)
+            await pipe.execute()
+
+
+DEVICES_NAMESPACE = "devices"
+
+
+def device_customers_namespace(device_id: int) -> str:
+    return f"devices/{device_id}/customers"
+
+
+def page_field(size: int, cursor: Optional[str]) -> str:
+    return f"{size}:{cursor or ''}"
+
+
+response_cache = ResponseCache(
+    ttl=config.redis.redis_cache_ttl,
+    lock_timeout=config.redis.redis_cache_lock_timeout,
+)
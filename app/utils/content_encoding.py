@@ -0,0 +1,36 @@
+from typing import Dict, Optional, Sequence
+
+
+def accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """Content codings of an ``Accept-Encoding`` header and their q-values,
+    eg. ``"br;q=1.0, gzip;q=0.8"`` -> ``{"br": 1.0, "gzip": 0.8}``."""
+    encodings = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        encodings[coding] = q
+    return encodings
+
+
+def preferred_encoding(
+    accept_encoding: str, available: Sequence[str]
+) -> Optional[str]:
+    """The ``available`` coding the client prefers, ties going to the
+    first one listed; None when it accepts none of them."""
+    accepted = accepted_encodings(accept_encoding)
+    best, best_q = None, 0.0
+    for coding in available:
+        q = accepted.get(coding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
@@ -0,0 +1,48 @@
+import csv
+import io
+from typing import AsyncIterator, Dict, Sequence
+
+import orjson
+from sqlalchemy.engine import Row
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_MEDIA_TYPE = "text/csv"
+
+
+def _customer_record(row: Row) -> Dict[str, object]:
+    """Shape a flat export row like ``CustomerObj`` with a nested device."""
+    record = dict(row._mapping)
+    device = {
+        "id": record["device_id"],
+        "is_active": record.pop("device_is_active"),
+        "is_delete": record.pop("device_is_delete"),
+    }
+    record["birth_date"] = record["birth_date"].date()
+    record["device"] = device if record["device_id"] is not None else None
+    return record
+
+
+async def customer_ndjson_chunks(
+        partitions: AsyncIterator[Sequence[Row]]) -> AsyncIterator[bytes]:
+    """Encode each partition of customer rows as one NDJSON chunk."""
+    async for rows in partitions:
+        yield b"".join(
+            orjson.dumps(_customer_record(row)) + b"\n" for row in rows
+        )
+
+
+async def csv_chunks(
+    partitions: AsyncIterator[Sequence[Row]], fieldnames: Sequence[str]
+) -> AsyncIterator[bytes]:
+    """Encode a header line, then each partition of rows as one CSV chunk."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(fieldnames)
+    yield buffer.getvalue().encode()
+
+    async for rows in partitions:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
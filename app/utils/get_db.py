@@ -1,16 +1,16 @@
 import logging
 
 from app.exceptions.configure_exceptions import ServerErrorException
-from .redis import RedisSession
-from redis import Redis
+from app.resources import get_resources
+from redis.asyncio import Redis
 
 logger = logging.getLogger(__name__)
 
 
 def get_redis_db() -> Redis:
     try:
-        db = RedisSession
-        logger.debug("Start db session {}".format(RedisSession))
+        db = get_resources().redis
+        logger.debug("Start db session {}".format(db))
         return db
     except Exception as e:
         logger.error(e)
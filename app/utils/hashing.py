@@ -0,0 +1,229 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from passlib.context import CryptContext
+from passlib.hash import argon2, bcrypt
+
+from app.config import PasswordHashSetting, config
+from app.exceptions.configure_exceptions import ServiceUnavailableException
+from app.utils.metrics import PASSWORD_HASH_LATENCY, PASSWORD_HASH_QUEUE_DEPTH
+
+logger = logging.getLogger("__main__")
+
+BCRYPT_MIN_ROUNDS = 10
+BCRYPT_MAX_ROUNDS = 31
+ARGON2_MIN_TIME_COST = 1
+ARGON2_MAX_TIME_COST = 64
+CALIBRATION_SECRET = "calibration-password"
+
+
+class HashWorkerPool:
+    """Bounded thread pool for password hashing.
+
+    bcrypt releases the GIL while hashing, so running it on a thread pool
+    keeps the event loop responsive. At most ``max_workers`` hashes run at
+    once and at most ``max_queue`` wait behind them; anything beyond that
+    is rejected immediately instead of piling up. Bulk jobs (:meth:`map`)
+    share half of the workers.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="password-hash"
+        )
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._count = 0
+        self._rejected = 0
+        self._hash_seconds = 0.0
+        self._hash_seconds_max = 0.0
+        self._wait_seconds = 0.0
+        self._bulk_slots: Optional[asyncio.Semaphore] = None
+
+    @property
+    def bulk_workers(self) -> int:
+        return max(1, self.max_workers // 2)
+
+    @property
+    def queue_depth(self) -> int:
+        return self._pending - self._running
+
+    def _timed(
+        self, submitted: float, fn: Callable[..., Any], *args: Any
+    ) -> Tuple[Any, float, float]:
+        started = time.perf_counter()
+        with self._lock:
+            self._running += 1
+        try:
+            result = fn(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+        return result, started - submitted, time.perf_counter() - started
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self._pending >= self.max_workers + self.max_queue:
+            self._rejected += 1
+            raise ServiceUnavailableException("Password hashing queue is full")
+
+        self._pending += 1
+        PASSWORD_HASH_QUEUE_DEPTH.set(self.queue_depth)
+        loop = asyncio.get_running_loop()
+        try:
+            result, waited, elapsed = await loop.run_in_executor(
+                self._executor, self._timed, time.perf_counter(), fn, *args
+            )
+        finally:
+            self._pending -= 1
+            PASSWORD_HASH_QUEUE_DEPTH.set(self.queue_depth)
+
+        self._count += 1
+        self._wait_seconds += waited
+        self._hash_seconds += elapsed
+        self._hash_seconds_max = max(self._hash_seconds_max, elapsed)
+        PASSWORD_HASH_LATENCY.observe(elapsed)
+        return result
+
+    async def map(
+            self, fn: Callable[..., Any], items: Sequence[Any]) -> List[Any]:
+        """Run ``fn`` over ``items`` with at most ``bulk_workers`` in flight
+        across all bulk jobs, so the other workers stay free for logins and
+        single signups however many bulk requests run at once.
+
+        When one item fails, the items not started yet are cancelled and
+        the error is raised."""
+        slots = self._bulk_slots
+        if slots is None:
+            # Created on first use so it binds to the serving event loop.
+            slots = self._bulk_slots = asyncio.Semaphore(self.bulk_workers)
+
+        async def _run(item: Any) -> Any:
+            async with slots:
+                return await self.run(fn, item)
+
+        tasks = [asyncio.ensure_future(_run(item)) for item in items]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            # One item failed (or the request was cancelled): the rest are
+            # not wanted, so they must not keep holding the workers.
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pid": os.getpid(),
+            "workers": self.max_workers,
+            "queue_size": self.max_queue,
+            "queue_depth": self.queue_depth,
+            "running": self._running,
+            "completed": self._count,
+            "rejected": self._rejected,
+            "hash_seconds_total": self._hash_seconds,
+            "hash_seconds_avg": self._hash_seconds / self._count
+            if self._count else 0.0,
+            "hash_seconds_max": self._hash_seconds_max,
+            "wait_seconds_total": self._wait_seconds,
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+def context_options(
+    settings: PasswordHashSetting,
+    bcrypt_rounds: int,
+    argon2_time_cost: int,
+) -> Dict[str, Any]:
+    """Build CryptContext options for the given cost parameters.
+
+    The configured scheme is the default, every other scheme is deprecated
+    and the costs are also the minimum desired ones, so ``needs_update``
+    flags any stored hash produced with an older scheme or a lower cost.
+    """
+    return {
+        "schemes": ["argon2", "bcrypt"],
+        "default": settings.PASSWORD_HASH_SCHEME,
+        "deprecated": "auto",
+        "bcrypt__default_rounds": bcrypt_rounds,
+        "bcrypt__min_rounds": bcrypt_rounds,
+        "argon2__type": "ID",
+        "argon2__default_rounds": argon2_time_cost,
+        "argon2__min_rounds": argon2_time_cost,
+        "argon2__memory_cost": settings.PASSWORD_HASH_ARGON2_MEMORY_COST,
+        "argon2__parallelism": settings.PASSWORD_HASH_ARGON2_PARALLELISM,
+    }
+
+
+def _measure(handler: Any) -> float:
+    started = time.perf_counter()
+    handler.hash(CALIBRATION_SECRET)
+    return time.perf_counter() - started
+
+
+def calibrate_bcrypt_rounds(target: float) -> int:
+    # Every extra bcrypt round doubles the cost, so a single measurement
+    # at the floor is enough to extrapolate.
+    rounds = BCRYPT_MIN_ROUNDS
+    elapsed = _measure(bcrypt.using(rounds=rounds))
+    while rounds < BCRYPT_MAX_ROUNDS and elapsed * 2 <= target:
+        rounds += 1
+        elapsed *= 2
+    return rounds
+
+
+def calibrate_argon2_time_cost(
+        target: float, settings: PasswordHashSetting) -> int:
+    # Memory cost is kept as configured; time cost scales roughly linearly.
+    elapsed = _measure(argon2.using(
+        type="ID",
+        rounds=ARGON2_MIN_TIME_COST,
+        memory_cost=settings.PASSWORD_HASH_ARGON2_MEMORY_COST,
+        parallelism=settings.PASSWORD_HASH_ARGON2_PARALLELISM,
+    ))
+    time_cost = int(target / elapsed) if elapsed else ARGON2_MIN_TIME_COST
+    return min(max(time_cost, ARGON2_MIN_TIME_COST), ARGON2_MAX_TIME_COST)
+
+
+def configure_pwd_context(
+    settings: PasswordHashSetting = config.password_hash,
+    calibrate: bool = config.password_hash.PASSWORD_HASH_CALIBRATE,
+) -> CryptContext:
+    """Apply the configured (or calibrated) costs to ``pwd_context``."""
+    bcrypt_rounds = settings.PASSWORD_HASH_BCRYPT_ROUNDS
+    argon2_time_cost = settings.PASSWORD_HASH_ARGON2_TIME_COST
+
+    if calibrate:
+        target = settings.PASSWORD_HASH_TARGET_MS / 1000
+        if settings.PASSWORD_HASH_SCHEME == "bcrypt":
+            bcrypt_rounds = calibrate_bcrypt_rounds(target)
+        else:
+            argon2_time_cost = calibrate_argon2_time_cost(target, settings)
+        logger.info(
+            f"Calibrated {settings.PASSWORD_HASH_SCHEME} for "
+            f"{settings.PASSWORD_HASH_TARGET_MS}ms: "
+            f"bcrypt_rounds={bcrypt_rounds} "
+            f"argon2_time_cost={argon2_time_cost}"
+        )
+
+    pwd_context.load(
+        context_options(settings, bcrypt_rounds, argon2_time_cost)
+    )
+    return pwd_context
+
+
+pwd_context = CryptContext(**context_options(
+    config.password_hash,
+    bcrypt_rounds=config.password_hash.PASSWORD_HASH_BCRYPT_ROUNDS,
+    argon2_time_cost=config.password_hash.PASSWORD_HASH_ARGON2_TIME_COST,
+))
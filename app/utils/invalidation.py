@@ -0,0 +1,85 @@
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional
+
+import orjson
+from redis.asyncio import Redis
+
+from app.config import config
+from app.utils.get_db import get_redis_db
+
+logger = logging.getLogger("__main__")
+
+RECONNECT_DELAY = 1.0
+
+InvalidationHandler = Callable[[List[str]], None]
+
+
+class InvalidationBus:
+    """Broadcast cache invalidations to every worker over Redis pub/sub.
+
+    Handlers are registered per topic and receive the published keys.
+    The publishing worker applies its own invalidation immediately; the
+    others apply it when the message arrives. Pub/sub is fire-and-forget,
+    so caches fed by this bus must still bound staleness with a TTL.
+    Without ``redis`` the worker's shared client is used.
+    """
+
+    def __init__(self, channel: str, redis: Optional[Redis] = None):
+        self._redis = redis
+        self.channel = channel
+        self._handlers: Dict[str, InvalidationHandler] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def redis(self) -> Redis:
+        return self._redis if self._redis is not None else get_redis_db()
+
+    def register(self, topic: str, handler: InvalidationHandler) -> None:
+        self._handlers[topic] = handler
+
+    def _dispatch(self, topic: str, keys: List[str]) -> None:
+        handler = self._handlers.get(topic)
+        if handler is not None:
+            handler(keys)
+
+    async def publish(self, topic: str, *keys: object) -> None:
+        str_keys = [str(k) for k in keys]
+        self._dispatch(topic, str_keys)
+        await self.redis.publish(
+            self.channel, orjson.dumps({"topic": topic, "keys": str_keys}))
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        data = orjson.loads(message["data"])
+                        self._dispatch(data["topic"], data["keys"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Invalidation listener error: {e}")
+                await asyncio.sleep(RECONNECT_DELAY)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(
+                self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+invalidation_bus = InvalidationBus(
+    channel=f"/{config.redis.redis_prefix}/invalidate"
+)
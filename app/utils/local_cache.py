@@ -0,0 +1,65 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from app.utils.metrics import LOCAL_CACHE_REQUESTS, LOCAL_CACHE_SIZE
+
+
+class TTLCache:
+    """Per-worker LRU cache whose entries also expire after a TTL.
+
+    Not shared between gunicorn workers; cross-worker invalidation goes
+    through :mod:`app.utils.invalidation`.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is not None and item[0] <= time.monotonic():
+            del self._data[key]
+            item = None
+
+        if item is None:
+            self.misses += 1
+            LOCAL_CACHE_REQUESTS.labels(self.name, "miss").inc()
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        LOCAL_CACHE_REQUESTS.labels(self.name, "hit").inc()
+        return item[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        LOCAL_CACHE_SIZE.labels(self.name).set(len(self._data))
+
+    def delete(self, *keys: Hashable) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+        LOCAL_CACHE_SIZE.labels(self.name).set(len(self._data))
+
+    def clear(self) -> None:
+        self._data.clear()
+        LOCAL_CACHE_SIZE.labels(self.name).set(0)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
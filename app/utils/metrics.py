@@ -0,0 +1,87 @@
+import os
+from typing import Dict
+
+from prometheus_client import (
+    REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest,
+    multiprocess
+)
+from sqlalchemy.pool import Pool
+
+# When set (see gunicorn.conf.py) every worker writes its samples to this
+# directory and /metrics aggregates them across workers.
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route.",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests being served.",
+    ["method", "route"],
+    multiprocess_mode="livesum",
+)
+
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Connections checked out of the SQLAlchemy pool.",
+    ["pool"],
+    multiprocess_mode="liveall",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Connections opened beyond pool_size.",
+    ["pool"],
+    multiprocess_mode="liveall",
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent acquiring a connection from the SQLAlchemy pool.",
+    ["pool"],
+    buckets=(.001, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10),
+)
+
+REDIS_COMMAND_LATENCY = Histogram(
+    "redis_command_duration_seconds",
+    "Redis command latency.",
+    ["command"],
+    buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1),
+)
+
+PASSWORD_HASH_LATENCY = Histogram(
+    "password_hash_duration_seconds",
+    "Time spent hashing or verifying a password on the worker pool.",
+    buckets=(.01, .025, .05, .1, .2, .3, .5, .75, 1, 2.5),
+)
+PASSWORD_HASH_QUEUE_DEPTH = Gauge(
+    "password_hash_queue_depth",
+    "Password hashing calls waiting for a worker.",
+    multiprocess_mode="liveall",
+)
+
+LOCAL_CACHE_REQUESTS = Counter(
+    "local_cache_requests_total",
+    "In-process cache lookups by result (hit or miss).",
+    ["cache", "result"],
+)
+LOCAL_CACHE_SIZE = Gauge(
+    "local_cache_size",
+    "Entries held by an in-process cache.",
+    ["cache"],
+    multiprocess_mode="liveall",
+)
+
+
+def observe_pools(pools: Dict[str, Pool]) -> None:
+    for name, pool in pools.items():
+        DB_POOL_CHECKED_OUT.labels(name).set(pool.checkedout())  # type: ignore
+        DB_POOL_OVERFLOW.labels(name).set(pool.overflow())    # type: ignore
+
+
+def render_metrics() -> bytes:
+    if os.environ.get(MULTIPROC_DIR_ENV):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
@@ -0,0 +1,82 @@
+import gzip
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Dict
+
+import orjson
+from fastapi import FastAPI, Request
+from fastapi.openapi.utils import get_openapi
+from starlette.responses import Response
+
+from app.utils.content_encoding import preferred_encoding
+
+# Clients revalidate on every poll and get a 304 while the schema is the
+# same.
+CACHE_CONTROL = "no-cache"
+
+
+def build_schema(app: FastAPI) -> Dict[str, Any]:
+    return get_openapi(
+        title=app.title, version=app.version,
+        description=app.description, routes=app.routes
+    )
+
+
+@dataclass(frozen=True)
+class OpenAPIArtifact:
+    """The OpenAPI schema serialized, gzipped and hashed once, served as
+    bytes with a strong ETag per encoding."""
+
+    body: bytes
+    gzipped: bytes
+    etag: str
+
+    @classmethod
+    def from_body(cls, body: bytes) -> "OpenAPIArtifact":
+        return cls(
+            body=body,
+            gzipped=gzip.compress(body, compresslevel=9, mtime=0),
+            etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+        )
+
+    @classmethod
+    def from_app(cls, app: FastAPI) -> "OpenAPIArtifact":
+        return cls.from_body(orjson.dumps(build_schema(app)))
+
+    @classmethod
+    def load(cls, path: str) -> "OpenAPIArtifact":
+        with open(path, "rb") as f:
+            return cls.from_body(f.read())
+
+    @property
+    def gzip_etag(self) -> str:
+        # The gzipped body is a different representation and needs a
+        # different strong validator.
+        return f'{self.etag[:-1]}-gz"'
+
+    def not_modified(self, request: Request) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is None:
+            return False
+        tags = {t.strip() for t in if_none_match.split(",")}
+        # If-None-Match compares weakly: W/"x" matches "x".
+        tags |= {t[2:] for t in tags if t.startswith("W/")}
+        # Either encoding is the same schema, so either tag revalidates.
+        return "*" in tags or self.etag in tags or self.gzip_etag in tags
+
+    def response(self, request: Request) -> Response:
+        accept_encoding = request.headers.get("accept-encoding", "")
+        gzipped = preferred_encoding(accept_encoding, ("gzip",)) is not None
+        headers = {
+            "ETag": self.gzip_etag if gzipped else self.etag,
+            "Cache-Control": CACHE_CONTROL,
+            "Vary": "Accept-Encoding",
+        }
+        if self.not_modified(request):
+            return Response(status_code=304, headers=headers)
+        if gzipped:
+            headers["Content-Encoding"] = "gzip"
+            return Response(
+                self.gzipped, media_type="application/json", headers=headers)
+        return Response(
+            self.body, media_type="application/json", headers=headers)
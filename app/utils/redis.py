@@ -1,10 +1,16 @@
-import redis
-from app.config import config
+import time
 
+import redis.asyncio as aioredis
+from app.utils.metrics import REDIS_COMMAND_LATENCY
 
-pool = redis.ConnectionPool(
-    host=config.redis.redis_host,
-    port=config.redis.redis_port
-)
 
-RedisSession = redis.Redis(connection_pool=pool)
+class InstrumentedRedis(aioredis.Redis):
+    """Redis client recording per-command latency."""
+
+    async def execute_command(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            REDIS_COMMAND_LATENCY.labels(str(args[0]).upper()).observe(
+                time.perf_counter() - started)
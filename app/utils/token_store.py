@@ -0,0 +1,192 @@
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Union
+
+from redis.asyncio import Redis
+
+from app.config import config
+
+REFRESH_TOKEN_TYPE = "refresh"
+
+# KEYS[1]: token hash; ARGV: now, required jti ("" for none), refresh jti
+# replacing the required one ("" to keep it), expireat ("" to keep), then
+# jti/value pairs to write. A replaced refresh token is dropped and the
+# access tokens issued from it are re-linked to its replacement.
+# Returns 0 without writing when the required jti is missing or expired.
+ISSUE_TOKENS_SCRIPT = """
+local now = tonumber(ARGV[1])
+local function expired(value)
+    return tonumber(string.match(value, '^(%d+):')) <= now
+end
+
+if ARGV[2] ~= '' then
+    local required = redis.call('HGET', KEYS[1], ARGV[2])
+    if not required or expired(required) then
+        return 0
+    end
+    if ARGV[3] ~= '' then
+        redis.call('HDEL', KEYS[1], ARGV[2])
+    end
+end
+
+local entries = redis.call('HGETALL', KEYS[1])
+for i = 1, #entries, 2 do
+    if expired(entries[i + 1]) then
+        redis.call('HDEL', KEYS[1], entries[i])
+    elseif ARGV[3] ~= '' then
+        local head, issuer = string.match(entries[i + 1], '^(%d+:[^:]*:)(.*)$')
+        if issuer == ARGV[2] then
+            redis.call('HSET', KEYS[1], entries[i], head .. ARGV[3])
+        end
+    end
+end
+
+for i = 5, #ARGV, 2 do
+    redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+if ARGV[4] ~= '' then
+    redis.call('EXPIREAT', KEYS[1], ARGV[4])
+end
+return 1
+"""
+
+# KEYS[1]: token hash; ARGV: now, jti of the presented token, its type.
+# Drops that token, its session's refresh token, every access token issued
+# from the latter and any expired entry; returns the dropped jtis.
+REVOKE_SESSION_SCRIPT = """
+local now = tonumber(ARGV[1])
+local refresh_jti = ''
+if ARGV[3] == 'refresh' then
+    refresh_jti = ARGV[2]
+else
+    local current = redis.call('HGET', KEYS[1], ARGV[2])
+    if current then
+        refresh_jti = string.match(current, '^%d+:[^:]*:(.*)$')
+    end
+end
+
+local revoked = {}
+local entries = redis.call('HGETALL', KEYS[1])
+for i = 1, #entries, 2 do
+    local jti = entries[i]
+    local exp, issuer = string.match(entries[i + 1], '^(%d+):[^:]*:(.*)$')
+    if jti == ARGV[2] or tonumber(exp) <= now or (refresh_jti ~= ''
+            and (jti == refresh_jti or issuer == refresh_jti)) then
+        redis.call('HDEL', KEYS[1], jti)
+        revoked[#revoked + 1] = jti
+    end
+end
+return revoked
+"""
+
+
+@dataclass
+class TokenEntry:
+    """One issued JWT, stored as ``<exp>:<type>:<refresh jti>``."""
+
+    jti: str
+    type: str
+    exp: int
+    refresh_jti: Optional[str] = None
+
+    def dumps(self) -> str:
+        return f"{self.exp}:{self.type}:{self.refresh_jti or ''}"
+
+    @classmethod
+    def loads(cls, jti: str, raw: Union[bytes, str]) -> "TokenEntry":
+        if isinstance(raw, bytes):
+            raw = raw.decode()
+        exp, token_type, refresh_jti = raw.split(":", 2)
+        return cls(
+            jti=jti, type=token_type, exp=int(exp),
+            refresh_jti=refresh_jti or None
+        )
+
+    def expired(self, now: float) -> bool:
+        return self.exp <= now
+
+
+class TokenStore:
+    """Index of the tokens issued to one subject, in a single Redis hash.
+
+    Fields are token JTIs and every entry carries its own expiry; an entry
+    past it is treated as missing and pruned on the next write. The hash
+    expires together with its newest refresh token, which always outlives
+    the access tokens issued next to it. Issuing tokens and revoking a
+    session are atomic script calls, and revoking all sessions is one
+    transaction, whatever the token count.
+    """
+
+    def __init__(self, redis: Redis):
+        self.redis = redis
+        self._issue = redis.register_script(ISSUE_TOKENS_SCRIPT)
+        self._revoke_session = redis.register_script(REVOKE_SESSION_SCRIPT)
+
+    @staticmethod
+    def key(sub: str, instance_id: object) -> str:
+        return f"/{config.redis.redis_prefix}/auth/{sub}/{instance_id}/tokens"
+
+    @classmethod
+    def key_for(cls, raw_jwt: Dict) -> str:
+        sub = raw_jwt['sub']
+        return cls.key(sub, raw_jwt[f"{sub}_id"])
+
+    async def entries(self, key: str) -> List[TokenEntry]:
+        raw = await self.redis.hgetall(key)
+        return [
+            TokenEntry.loads(
+                jti.decode() if isinstance(jti, bytes) else jti, v)
+            for jti, v in raw.items()
+        ]
+
+    async def add(
+        self,
+        key: str,
+        *entries: TokenEntry,
+        require: Optional[str] = None,
+        replace: bool = False,
+    ) -> bool:
+        """Write ``entries`` and prune expired ones in one round trip.
+
+        With ``require``, nothing is written unless that JTI is present and
+        unexpired; ``replace`` also drops it in favour of the refresh token
+        among ``entries`` (refresh token rotation), which the access tokens
+        issued from it are re-linked to, so revoking the new session still
+        revokes them. Returns whether the entries were written.
+        """
+        refresh = [e for e in entries if e.type == REFRESH_TOKEN_TYPE]
+        args: List[Union[int, str]] = [
+            int(time.time()),
+            require or "",
+            refresh[0].jti if replace and require and refresh else "",
+            max(e.exp for e in refresh) if refresh else "",
+        ]
+        for entry in entries:
+            args += [entry.jti, entry.dumps()]
+        return bool(await self._issue(keys=[key], args=args))
+
+    async def get(self, raw_jwt: Dict) -> Optional[TokenEntry]:
+        raw = await self.redis.hget(self.key_for(raw_jwt), raw_jwt['jti'])
+        if raw is None:
+            return None
+        entry = TokenEntry.loads(raw_jwt['jti'], raw)
+        return None if entry.expired(time.time()) else entry
+
+    async def revoke_session(self, raw_jwt: Dict) -> List[str]:
+        """Drop the token's refresh token and every access token issued
+        from it (plus any expired entries) in one atomic script call;
+        returns the dropped JTIs."""
+        revoked = await self._revoke_session(
+            keys=[self.key_for(raw_jwt)],
+            args=[int(time.time()), raw_jwt['jti'], raw_jwt['type']],
+        )
+        return [jti.decode() for jti in revoked]
+
+    async def revoke_all(self, raw_jwt: Dict) -> List[str]:
+        """Drop every token of the subject; returns the dropped JTIs."""
+        key = self.key_for(raw_jwt)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hkeys(key)
+            pipe.delete(key)
+            jtis, _ = await pipe.execute()
+        return [jti.decode() for jti in jtis]
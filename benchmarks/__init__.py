@@ -0,0 +1,5 @@
+"""Microbenchmarks; run one with ``python -m benchmarks.<name>``.
+
+They import the application, so the usual settings (DATABASE_URI, ...)
+must be set, but none of them connects to a database.
+"""
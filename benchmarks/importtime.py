@@ -0,0 +1,104 @@
+"""Import time of the application, as seen by a booting worker or a test
+collection run, checked against a budget.
+
+Each run imports ``app.main`` in a fresh interpreter under
+``python -X importtime`` and reads the cumulative time of the module. The
+median of the runs is compared to the budget, and the slowest modules of
+the last run are listed to show where the time goes. Exits non-zero when
+over budget, so it can gate CI.
+
+Import time varies a lot between machines and runs, so the default budget
+leaves ample headroom. For a tighter gate, record a baseline on the CI
+machine and check later runs against it, within a tolerance:
+
+    python -m benchmarks.importtime [--runs N] [--budget-ms MS] [--top N]
+    python -m benchmarks.importtime --record importtime.json
+    python -m benchmarks.importtime --baseline importtime.json
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import List, Optional, Tuple
+
+MODULE = "app.main"
+DEFAULT_BUDGET_MS = 1500
+DEFAULT_TOLERANCE = 0.25
+
+
+def import_times(module: str) -> List[Tuple[str, int, int]]:
+    """(module, self us, cumulative us) of every import made by
+    ``import module`` in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    )
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():    # the header line
+            continue
+        times.append((name.strip(), int(self_us), int(cumulative_us)))
+    return times
+
+
+def main(
+    runs: int,
+    budget_ms: float,
+    top: int,
+    baseline: Optional[str] = None,
+    tolerance: float = DEFAULT_TOLERANCE,
+    record: Optional[str] = None,
+) -> int:
+    totals = []
+    for _ in range(runs):
+        times = import_times(MODULE)
+        totals.append(next(c for name, _, c in times if name == MODULE) / 1e3)
+    median = statistics.median(totals)
+
+    if baseline is not None:
+        with open(baseline) as f:
+            baseline_ms = json.load(f)["median_ms"]
+        budget_ms = baseline_ms * (1 + tolerance)
+        budget = (f"budget {budget_ms:.0f}ms ({baseline_ms:.1f}ms baseline "
+                  f"+{tolerance:.0%})")
+    else:
+        budget = f"budget {budget_ms:.0f}ms"
+
+    print("slowest imports of the last run (cumulative ms, self ms):")
+    for name, self_us, cumulative_us in sorted(
+            times, key=lambda t: t[2], reverse=True)[:top]:
+        print(f"  {cumulative_us / 1e3:8.1f}  {self_us / 1e3:8.1f}  {name}")
+    print(
+        f"import {MODULE}: median {median:.1f}ms over {runs} runs "
+        f"(min {min(totals):.1f}ms, max {max(totals):.1f}ms), {budget}"
+    )
+    if record is not None:
+        with open(record, "w") as f:
+            json.dump({"module": MODULE, "runs": runs, "median_ms": median}, f)
+        print(f"recorded baseline in {record}")
+    return 0 if median <= budget_ms else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument(
+        "--baseline",
+        help="JSON file written by --record; check against it instead of "
+             "--budget-ms")
+    parser.add_argument(
+        "--tolerance", type=float, default=DEFAULT_TOLERANCE,
+        help="allowed slowdown over the baseline, as a fraction")
+    parser.add_argument(
+        "--record", help="write the median to this file as a baseline")
+    args = parser.parse_args()
+    sys.exit(main(
+        args.runs, args.budget_ms, args.top,
+        baseline=args.baseline, tolerance=args.tolerance, record=args.record,
+    ))
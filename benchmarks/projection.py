@@ -0,0 +1,95 @@
+"""Memory and CPU of loading one 10k-row customer page as ORM entities
+(select(Customer) + selectinload(device), as the listings did before)
+versus the column projection of app.controllers.customers.
+
+Runs on an in-memory SQLite database through a sync Session, so the
+numbers compare the Python side only: row fetch, hydration and the
+identity map. Memory is measured with tracemalloc while the page is held.
+
+    python -m benchmarks.projection [--rows N]
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, List
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session, selectinload
+
+from app.controllers.customers import CUSTOMERS_PAGE
+from app.database.config import BaseModel
+from app.database.models import Customer, Devices
+
+
+def seed(session: Session, count: int) -> None:
+    session.execute(insert(Devices), [
+        {"id": i, "is_active": True, "is_delete": False}
+        for i in range(1, 101)
+    ])
+    session.execute(insert(Customer), [
+        {
+            "id": i, "email": f"user{i}@example.com",
+            "password": "$2b$12$" + "x" * 53, "phone": "+84123234345",
+            "prefix": "+84", "first_name": "Phuc", "last_name": "Cao",
+            "gender": "MALE", "birth_date": datetime(2022, 8, 11),
+            "address": "string", "weight": 64, "height": 164, "group": 1,
+            "device_id": i % 100 + 1,
+        }
+        for i in range(1, count + 1)
+    ])
+    session.commit()
+
+
+def orm_page(session: Session, count: int) -> List[Any]:
+    stmt = select(Customer).options(
+        selectinload(Customer.device)
+    ).order_by(Customer.id).limit(count)
+    return session.execute(stmt).scalars().all()
+
+
+def projected_page(session: Session, count: int) -> List[Any]:
+    result = session.execute(CUSTOMERS_PAGE.first_page, {"limit": count})
+    return [CUSTOMERS_PAGE.build(row) for row in result]
+
+
+def measure(
+    engine, fn: Callable[[Session, int], List[Any]], count: int
+) -> str:
+    timings = []
+    for _ in range(3):
+        with Session(engine) as session:
+            started = time.perf_counter()
+            fn(session, count)
+            timings.append(time.perf_counter() - started)
+
+    with Session(engine) as session:
+        gc.collect()
+        tracemalloc.start()
+        page = fn(session, count)
+        held, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        identity_map = len(session.identity_map)
+    assert len(page) == count
+    return (
+        f"{min(timings) * 1000:8.1f}ms  held {held / 2**20:6.1f}MiB  "
+        f"peak {peak / 2**20:6.1f}MiB  identity map {identity_map}"
+    )
+
+
+def main(count: int) -> None:
+    engine = create_engine("sqlite://", future=True)
+    BaseModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        seed(session, count)
+
+    print(f"{count} rows")
+    print(f"  orm entities  {measure(engine, orm_page, count)}")
+    print(f"  projection    {measure(engine, projected_page, count)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    main(parser.parse_args().rows)
@@ -0,0 +1,74 @@
+"""CPU cost of encoding a customer list response: FastAPI's default
+response_model path (validate every row through pydantic, then
+jsonable_encoder and json.dumps) versus the trusted-output field plan of
+app.utils.serialization.
+
+    python -m benchmarks.serialization [--rows 1000 10000]
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime
+from typing import Callable, List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.database.models import Customer, Devices
+from app.schemas import CustomerObj
+from app.utils.serialization import field_plan
+
+RESPONSE_FIELD = create_response_field(
+    name="Response_get_customers", type_=List[CustomerObj])
+
+
+def make_rows(count: int) -> List[Customer]:
+    devices = [Devices(id=i, is_active=True, is_delete=False)
+               for i in range(1, 101)]
+    return [
+        Customer(
+            id=i, email=f"user{i}@example.com", password="$2b$12$" + "x" * 53,
+            phone="+84123234345", prefix="+84", first_name="Phuc",
+            last_name="Cao", gender="MALE", birth_date=datetime(2022, 8, 11),
+            address="string", weight=64, height=164, group=1,
+            device_id=devices[i % 100].id, device=devices[i % 100],
+        )
+        for i in range(count)
+    ]
+
+
+def response_model_body(rows: List[Customer]) -> bytes:
+    content = asyncio.run(serialize_response(
+        field=RESPONSE_FIELD, response_content=rows))
+    return JSONResponse(content).body
+
+
+def field_plan_body(rows: List[Customer]) -> bytes:
+    return field_plan(CustomerObj).dumps(rows)
+
+
+def best_of(fn: Callable[[List[Customer]], bytes], rows, repeat: int = 5):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(rows)
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def main(row_counts: List[int]) -> None:
+    for count in row_counts:
+        rows = make_rows(count)
+        default = best_of(response_model_body, rows)
+        plan = best_of(field_plan_body, rows)
+        print(
+            f"{count:>6} rows  response_model {default:8.1f}ms  "
+            f"field plan {plan:7.1f}ms  ({default / plan:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000])
+    main(parser.parse_args().rows)
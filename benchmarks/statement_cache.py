@@ -0,0 +1,108 @@
+"""Per-query Python overhead of building statements per request versus the
+prebuilt statements of app.controllers (KeysetQuery and friends).
+
+Each iteration does what ``AsyncSession.execute`` does before reaching the
+driver: build the statement (old style only), compute its cache key and
+fetch the compiled form from a warm compiled cache. It also counts the
+distinct SQL strings sent for the device existence check, since asyncpg
+prepares (and caches) one statement per distinct string.
+
+    python -m benchmarks.statement_cache [--iterations N]
+"""
+import argparse
+import timeit
+from typing import Callable, Dict
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import asyncpg
+from sqlalchemy.orm import selectinload
+from sqlalchemy.util import LRUCache
+
+from app.controllers.customers import CUSTOMER_LOGIN, DEVICE_CUSTOMERS_PAGE
+from app.controllers.devices import EXISTING_DEVICE_IDS
+from app.database.models import Customer, Devices
+
+dialect = asyncpg.dialect()
+
+
+def compile_cached(stmt, cache: LRUCache):
+    compiled, _, _ = stmt._compile_w_cache(
+        dialect=dialect, compiled_cache=cache, column_keys=[])
+    return compiled
+
+
+def rebuilt_device_customers_page(cache: LRUCache):
+    stmt = select(Customer).options(
+        selectinload(Customer.device)
+    ).filter(Customer.device_id == 42).filter(
+        Customer.id > 100
+    ).order_by(Customer.id).limit(101)
+    return compile_cached(stmt, cache)
+
+
+def prebuilt_device_customers_page(cache: LRUCache):
+    return compile_cached(DEVICE_CUSTOMERS_PAGE.next_page, cache)
+
+
+def rebuilt_customer_login(cache: LRUCache):
+    stmt = select(
+        Customer.id, Customer.password, Customer.phone,
+        Customer.first_name, Customer.last_name,
+    ).filter(Customer.email == "user@example.com")
+    return compile_cached(stmt, cache)
+
+
+def prebuilt_customer_login(cache: LRUCache):
+    return compile_cached(CUSTOMER_LOGIN, cache)
+
+
+CASES: Dict[str, Dict[str, Callable[[LRUCache], object]]] = {
+    "device customers page": {
+        "rebuilt": rebuilt_device_customers_page,
+        "prebuilt": prebuilt_device_customers_page,
+    },
+    "customer login": {
+        "rebuilt": rebuilt_customer_login,
+        "prebuilt": prebuilt_customer_login,
+    },
+}
+
+
+def distinct_existence_sql(max_ids: int) -> Dict[str, int]:
+    rebuilt, prebuilt = set(), set()
+    for count in range(1, max_ids + 1):
+        ids = list(range(count))
+        stmt = select(Devices.id).filter(Devices.id.in_(ids))
+        rebuilt.add(str(stmt.compile(
+            dialect=dialect,
+            compile_kwargs={"render_postcompile": True})))
+        prebuilt.add(str(EXISTING_DEVICE_IDS.compile(dialect=dialect)))
+    return {"rebuilt": len(rebuilt), "prebuilt": len(prebuilt)}
+
+
+def main(iterations: int) -> None:
+    for name, variants in CASES.items():
+        results = {}
+        for variant, fn in variants.items():
+            cache = LRUCache(100)
+            fn(cache)
+            seconds = min(timeit.repeat(
+                lambda: fn(cache), number=iterations, repeat=5))
+            results[variant] = seconds / iterations * 1e6
+        print(
+            f"{name:<24} rebuilt {results['rebuilt']:8.1f}us  "
+            f"prebuilt {results['prebuilt']:8.1f}us  "
+            f"({results['rebuilt'] / results['prebuilt']:.1f}x)"
+        )
+
+    counts = distinct_existence_sql(50)
+    print(
+        f"{'device existence check':<24} distinct SQL for 1..50 ids: "
+        f"rebuilt {counts['rebuilt']}  prebuilt {counts['prebuilt']}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    main(parser.parse_args().iterations)
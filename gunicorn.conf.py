@@ -8,6 +8,8 @@ For options see:
 http://docs.gunicorn.org/en/stable/configure.html#configuration-file
 """
 import multiprocessing
+import os
+import shutil
 
 preload_app = False
 bind = "0.0.0.0:8080"
@@ -15,7 +17,27 @@ bind = "0.0.0.0:8080"
 timeout = 300
 loglevel = "info"
 
-workers = min(multiprocessing.cpu_count() * 2 + 1, 9)
+workers = int(os.environ.get(
+    "WEB_CONCURRENCY", min(multiprocessing.cpu_count() * 2 + 1, 9)
+))
+# Workers split DATABASE_CONNECTION_BUDGET by this count.
+os.environ["WEB_CONCURRENCY"] = str(workers)
 worker_tmp_dir = "/dev/shm"
 
 worker_class = "uvicorn.workers.UvicornWorker"
+
+# Workers write Prometheus samples here so /metrics can aggregate them.
+prometheus_multiproc_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", "/dev/shm/prometheus"
+)
+
+
+def on_starting(server):
+    shutil.rmtree(prometheus_multiproc_dir, ignore_errors=True)
+    os.makedirs(prometheus_multiproc_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,33 @@
+"""add customer indexes
+
+Revision ID: 3f9c2b7d8e41
+Revises: 175d7a21686e
+Create Date: 2026-10-18 09:12:41.503118
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2b7d8e41'
+down_revision = '175d7a21686e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Build without locking writes on large tables; CONCURRENTLY cannot
+    # run inside the migration transaction.
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_customer_email'), 'customer', ['email'],
+                        unique=False, postgresql_concurrently=True)
+        op.create_index('ix_customer_device_id', 'customer',
+                        ['device_id', 'id'],
+                        unique=False, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_customer_device_id', table_name='customer',
+                      postgresql_concurrently=True)
+        op.drop_index(op.f('ix_customer_email'), table_name='customer',
+                      postgresql_concurrently=True)
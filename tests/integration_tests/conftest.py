@@ -0,0 +1,75 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker, close_all_sessions
+
+from app.config import config
+from app.database.config import BaseModel
+
+SEED_DEVICES = 5000
+SEED_CUSTOMERS = 50000
+
+SEED_SQL = f"""
+INSERT INTO devices (is_active, is_delete)
+SELECT true, false FROM generate_series(1, {SEED_DEVICES});
+
+INSERT INTO customer (
+    email, password, phone, prefix, first_name, last_name, gender,
+    birth_date, address, weight, height, "group", device_id, created
+)
+SELECT
+    'user' || i || '@example.com', 'not-a-hash', '+84123234345', '+84',
+    'Phuc', 'Cao', 'MALE', '2022-08-11', 'string', 64, 164, 1,
+    i % {SEED_DEVICES} + 1, now()
+FROM generate_series(1, {SEED_CUSTOMERS}) AS i;
+"""
+
+
+@pytest.fixture(scope="module")
+def seeded_database():
+    """Schema from the models, seeded with enough rows that the planner
+    prefers indexes wherever one applies."""
+    engine = create_engine(config.db.DATABASE_URI, future=True)
+    try:
+        engine.connect().close()
+    except OperationalError:
+        pytest.skip("PostgreSQL is not available")
+
+    close_all_sessions()
+    BaseModel.metadata.drop_all(bind=engine)
+    BaseModel.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text(SEED_SQL))
+    with engine.connect().execution_options(
+            isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE"))
+
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+async def async_engine(seeded_database):
+    engine = create_async_engine(
+        config.db.ASYNC_DATABASE_URI,
+        **config.db.SQLALCHEMY_ENGINE_OPTIONS,
+        future=True
+    )
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+async def async_session(async_engine):
+    Session = sessionmaker(
+        autocommit=False,
+        autoflush=False,
+        bind=async_engine,
+        future=True,
+        class_=AsyncSession,
+        expire_on_commit=False,
+    )
+
+    async with Session() as session_:
+        yield session_
@@ -0,0 +1,107 @@
+import contextlib
+import json
+from typing import Dict, Iterator, List, Tuple
+
+import pytest
+from sqlalchemy import event, text
+
+from app import controllers
+from app.controllers.helpers import encode_cursor
+from app.exceptions.configure_exceptions import (
+    CustomerNotFound, ItemDoesNotExist
+)
+from app.schemas import CustomerSchema, ReqLoginSchema
+
+# All test coroutines will be treated as marked.
+pytestmark = pytest.mark.asyncio
+
+# A sequential scan is only acceptable on relations smaller than this.
+SEQ_SCAN_ROW_THRESHOLD = 1000
+
+MISSING_ID = 10 ** 9
+CUSTOMER_MISSING_DEVICE = {
+    "email": "new@example.com",
+    "password": "string123",
+    "phone": "+84123234345",
+    "prefix": "+84",
+    "first_name": "Phuc",
+    "last_name": "Cao",
+    "gender": "MALE",
+    "birth_date": "2022-08-11",
+    "address": "string",
+    "weight": 64,
+    "height": 164,
+    "group": 1,
+    "device_id": MISSING_ID,
+}
+
+# Hot-path controller calls; expected exceptions are raised after the
+# queries under test have run.
+HOT_PATH_CALLS = {
+    "get_customers": lambda db: controllers.customers.get_customers(
+        db, limit=100),
+    "get_customers_next_page": lambda db: controllers.customers.get_customers(
+        db, limit=100, cursor=encode_cursor(id=25000)),
+    "get_customers_by_device_id":
+        lambda db: controllers.customers.get_customers_by_device_id(
+            db, 42, limit=100),
+    "get_customers_by_device_id_next_page":
+        lambda db: controllers.customers.get_customers_by_device_id(
+            db, 42, limit=5, cursor=encode_cursor(id=20000)),
+    "get_devices": lambda db: controllers.devices.get_devices(
+        db, limit=100),
+    "get_devices_next_page": lambda db: controllers.devices.get_devices(
+        db, limit=100, cursor=encode_cursor(id=2500)),
+    "login": lambda db: controllers.customers.login(
+        db, ReqLoginSchema(email="missing@example.com", password="x"), None),
+    "create_customer_device_check":
+        lambda db: controllers.customers.create_customer(
+            db, CustomerSchema(**CUSTOMER_MISSING_DEVICE)),
+}
+EXPECTED_ERRORS = (CustomerNotFound, ItemDoesNotExist)
+
+
+def _plan_nodes(plan: Dict) -> Iterator[Dict]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+@pytest.mark.parametrize("name", sorted(HOT_PATH_CALLS))
+async def test_hot_path_avoids_large_seq_scans(
+        name, async_engine, async_session):
+    statements: List[Tuple[str, object]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        with contextlib.suppress(*EXPECTED_ERRORS):
+            await HOT_PATH_CALLS[name](async_session)
+    finally:
+        event.remove(
+            async_engine.sync_engine, "before_cursor_execute", capture)
+    await async_session.rollback()
+    assert statements, f"{name} issued no queries"
+
+    async with async_engine.connect() as conn:
+        result = await conn.execute(
+            text("SELECT relname, reltuples FROM pg_class"))
+        relation_rows = {r.relname: r.reltuples for r in result}
+
+        for statement, parameters in statements:
+            result = await conn.exec_driver_sql(
+                f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+            plan = result.scalar_one()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+
+            for node in _plan_nodes(plan[0]["Plan"]):
+                if node["Node Type"] != "Seq Scan":
+                    continue
+                rows = relation_rows.get(node["Relation Name"], 0)
+                assert rows < SEQ_SCAN_ROW_THRESHOLD, (
+                    f"{name} plans a sequential scan over "
+                    f"{node['Relation Name']} ({rows:.0f} rows):\n{statement}"
+                )
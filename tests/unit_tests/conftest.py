@@ -1,24 +1,47 @@
-from typing import Callable
 from unittest.mock import MagicMock, patch
 
 from async_asgi_testclient import TestClient
+from fakeredis import FakeAsyncRedis
 import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker, close_all_sessions
 
+from app import resources
 from app.config import config
 from app.database.config import BaseModel
+from app.database.query_stats import track_queries
 
 from . import helpers
+from .helpers import create_session_override
 
 
-def create_session_override(
-        session: AsyncSession) -> Callable[[], AsyncSession]:
-    def create_session_() -> AsyncSession:  # type: ignore
-        yield session
+@pytest.fixture
+def redis(monkeypatch):
+    """In-memory Redis (Lua scripts included) behind ``get_redis_db``."""
+    fake = FakeAsyncRedis()
+    registry = resources.Resources(config)
+    registry.redis = fake
+    monkeypatch.setattr(resources, "_resources", registry)
+    yield fake
+
+
+@pytest.fixture
+def override_dependency():
+    """Override an app dependency for one test:
+    ``override_dependency(create_session, replacement)``. Only the
+    overrides set through it are removed afterwards."""
+    from app.main import app
+
+    overridden = []
 
-    return create_session_
+    def override(dependency, replacement):
+        app.dependency_overrides[dependency] = replacement
+        overridden.append(dependency)
+
+    yield override
+    for dependency in overridden:
+        app.dependency_overrides.pop(dependency, None)
 
 
 @pytest.fixture
@@ -39,6 +62,7 @@ async def async_engine():
         **config.db.SQLALCHEMY_ENGINE_OPTIONS,
         future=True
     )
+    track_queries(engine)
     yield engine
     await engine.dispose()
 
@@ -89,10 +113,14 @@ def app(reset_database):
 
 
 @pytest.fixture
-async def client(app, async_session):
-    from app.database.depends import create_session
+async def client(app, async_session, override_dependency):
+    from app.database.depends import (
+        create_cached_read_session, create_read_session, create_session
+    )
 
     async with TestClient(app) as client_:
-        app.dependency_overrides[create_session] = \
-            create_session_override(async_session)
+        for dependency in (create_session, create_read_session,
+                           create_cached_read_session):
+            override_dependency(
+                dependency, create_session_override(async_session))
         yield client_
@@ -1,11 +1,11 @@
 import json
+import re
 from pathlib import Path
-from typing import Dict, Union, List
+from typing import Any, AsyncIterator, Callable, Dict, List, Sequence, Union
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import controllers
-from app.database.models import Customer
 from app.schemas import DeviceSchema, CustomerSchema
 
 DATA_ROOT = Path(__file__).parent / "data"
@@ -30,12 +30,92 @@ def table_records(path: str) -> List[CustomerSchema]:
     return records
 
 
-async def populate_db(session: AsyncSession, path: str) -> List[Customer]:
+async def populate_db(session: AsyncSession, path: str) -> List[int]:
     records = table_records(path)
-    db_records = []
+    results = await controllers.customers.bulk_create_customers(
+        session, records)
 
-    for record in records:
-        db_record = await controllers.customers.create_customer(session, record)
-        db_records.append(db_record)
+    return [result.id for result in results if result.id is not None]
 
-    return db_records
+
+def assert_max_queries(response, max_queries: int) -> None:
+    """Fail if the request behind ``response`` ran more than
+    ``max_queries`` SQL statements, as reported in Server-Timing."""
+    match = re.search(
+        r'db;[^,]*desc="(\d+) queries"',
+        response.headers.get("Server-Timing", "")
+    )
+    assert match, "response has no db Server-Timing entry"
+    count = int(match.group(1))
+    assert count <= max_queries, \
+        f"expected at most {max_queries} queries, got {count}"
+
+
+def create_session_override(
+        session: AsyncSession) -> Callable[[], AsyncIterator[AsyncSession]]:
+    async def create_session_() -> AsyncIterator[AsyncSession]:
+        yield session
+
+    return create_session_
+
+
+async def authorized() -> None:
+    """Override for the access token dependency: lets every request in."""
+    return None
+
+
+class StubResult:
+    """The parts of a SQLAlchemy ``Result`` the controllers use, over
+    ``rows`` of column tuples."""
+
+    def __init__(self, rows: Sequence[Any]):
+        self.rows = list(rows)
+
+    def scalars(self) -> "StubResult":
+        return StubResult([row[0] for row in self.rows])
+
+    def scalar_one(self) -> Any:
+        (row,) = self.rows
+        return row[0]
+
+    def all(self) -> List[Any]:
+        return self.rows
+
+    def first(self) -> Any:
+        return self.rows[0] if self.rows else None
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+class StubSavepoint:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class StubSession:
+    """Stand-in for an ``AsyncSession`` that records the statements it
+    runs and answers each with the rows from :meth:`answer`."""
+
+    def __init__(self):
+        self.statements: List[Any] = []
+        self.commits = 0
+
+    def answer(self, stmt: Any, params: Dict[str, Any]) -> Sequence[Any]:
+        return []
+
+    async def execute(self, stmt, params=None):
+        self.statements.append(stmt)
+        return StubResult(self.answer(stmt, params or {}))
+
+    def begin_nested(self) -> StubSavepoint:
+        return StubSavepoint()
+
+    async def commit(self):
+        self.commits += 1
+
+    async def close(self):
+        pass
@@ -0,0 +1,144 @@
+import json
+from typing import List, Tuple
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import IntegrityError
+
+from app import controllers
+from app.config import config
+from app.controllers.devices import device_exists_cache
+from app.database.depends import create_session
+from app.main import app
+from app.utils.auth import PasswordHandle
+
+from .helpers import StubSession, create_session_override, table_records
+
+BULK_URL = f"{config.OPENAPI_PREFIX}/customer/bulk"
+
+
+class BulkSession(StubSession):
+    """Knows devices ``device_ids``, hands out ids from a sequence and
+    rejects any INSERT holding one of the ``rejected`` emails."""
+
+    def __init__(self, device_ids: List[int], rejected: Tuple[str, ...] = ()):
+        super().__init__()
+        self.device_ids = device_ids
+        self.rejected = rejected
+        self.next_id = 100
+        self.inserted: List[dict] = []
+
+    def answer(self, stmt, params):
+        if "ids" in params:
+            return [(i,) for i in params["ids"] if i in self.device_ids]
+        if "count" in params:
+            ids = range(self.next_id + 1, self.next_id + params["count"] + 1)
+            self.next_id += params["count"]
+            return [(i,) for i in ids]
+        rows = stmt.compile().params
+        if any(rows[name] in self.rejected for name in rows
+               if name.startswith("email")):
+            raise IntegrityError(str(stmt), rows, Exception("rejected"))
+        self.inserted.append(rows)
+        return []
+
+
+@pytest.fixture
+def bulk(monkeypatch, redis):
+    monkeypatch.setattr(
+        PasswordHandle, "_get_password_hash", lambda self, p: f"hash:{p}")
+    monkeypatch.setattr(config.bulk, "BULK_INSERT_BATCH_SIZE", 2)
+    device_exists_cache.clear()
+    yield
+    device_exists_cache.clear()
+
+
+def records(device_ids: List[int]):
+    template = table_records("customers")[0]
+    return [
+        template.copy(update={"email": f"bulk{i}@example.com",
+                              "device_id": device_id})
+        for i, device_id in enumerate(device_ids)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_bulk_ids_follow_input_order(bulk):
+    db = BulkSession(device_ids=[1])
+    data = records([1, 1, 1])
+
+    results = await controllers.customers.bulk_create_customers(db, data)
+
+    assert [r.id for r in results] == [101, 102, 103]
+    assert all(r.error is None for r in results)
+    assert db.commits == 1
+    # Batches of two, each written with the ids drawn for it.
+    assert [rows["id_m0"] for rows in db.inserted] == [101, 103]
+
+
+@pytest.mark.asyncio
+async def test_bulk_duplicate_emails_get_own_ids(bulk):
+    db = BulkSession(device_ids=[1])
+    data = records([1, 1, 1])
+    data[2] = data[2].copy(update={"email": data[0].email, "phone": "2"})
+
+    results = await controllers.customers.bulk_create_customers(db, data)
+
+    assert [r.id for r in results] == [101, 102, 103]
+    inserted = {}
+    for rows in db.inserted:
+        for name, value in rows.items():
+            if name.startswith("id_m"):
+                inserted[value] = rows[f"phone_{name[3:]}"]
+    assert inserted[103] == "2" and inserted[101] != "2"
+
+
+@pytest.mark.asyncio
+async def test_bulk_reports_rejected_rows(bulk):
+    db = BulkSession(device_ids=[1], rejected=("bulk1@example.com",))
+    data = records([1, 1, 1])
+
+    results = await controllers.customers.bulk_create_customers(db, data)
+
+    # The rejected batch is retried row by row; its other row is created.
+    assert [r.id for r in results] == [101, None, 103]
+    assert results[1].error == "Customer could not be created"
+    assert db.commits == 1
+
+
+@pytest.mark.asyncio
+async def test_bulk_reports_missing_devices(bulk):
+    db = BulkSession(device_ids=[1])
+    data = records([1, 2, 1])
+
+    results = await controllers.customers.bulk_create_customers(db, data)
+
+    assert [r.index for r in results] == [0, 1, 2]
+    assert results[0].id is not None and results[2].id is not None
+    assert results[1].id is None and "Device" in results[1].error
+
+
+def test_bulk_route_counts_failures(bulk, override_dependency):
+    db = BulkSession(device_ids=[1])
+    override_dependency(create_session, create_session_override(db))
+
+    data = [json.loads(r.json()) for r in records([1, 2, 3])]
+    response = TestClient(app).post(BULK_URL, json=data)
+
+    assert response.status_code == 201
+    body = response.json()
+    assert body["created"] == 1 and body["failed"] == 2
+    assert [r["error"] is None for r in body["results"]] == \
+        [True, False, False]
+
+
+@pytest.mark.asyncio
+async def test_bulk_checks_devices_on_primary(bulk):
+    # A replica read cached device 1 as missing before it replicated.
+    device_exists_cache.set(1, False)
+    db = BulkSession(device_ids=[1])
+
+    results = await controllers.customers.bulk_create_customers(
+        db, records([1]))
+
+    assert results[0].error is None and results[0].id is not None
@@ -0,0 +1,116 @@
+import asyncio
+import zlib
+
+import orjson
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from starlette.responses import Response
+
+from app.middlewares.compression import CompressionMiddleware
+from app.utils.content_encoding import preferred_encoding
+
+ROWS = [{"id": i, "email": f"user{i}@example.com"} for i in range(200)]
+
+compressed_app = FastAPI()
+compressed_app.add_middleware(
+    CompressionMiddleware, minimum_size=500,
+    media_types=["application/json", "application/x-ndjson"],
+)
+
+
+@compressed_app.get("/large")
+async def large():
+    return Response(orjson.dumps(ROWS), media_type="application/json",
+                    headers={"ETag": '"abc"'})
+
+
+@compressed_app.get("/small")
+async def small():
+    return Response(b'{"id": 1}', media_type="application/json")
+
+
+@compressed_app.get("/binary")
+async def binary():
+    return Response(b"\0" * 2000, media_type="image/png")
+
+
+@compressed_app.get("/stream")
+async def stream():
+    async def chunks():
+        for row in ROWS:
+            yield orjson.dumps(row) + b"\n"
+
+    return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+
+client = TestClient(compressed_app)
+
+
+def test_large_json_is_gzipped():
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["etag"] == 'W/"abc"'
+    assert int(response.headers["content-length"]) < len(orjson.dumps(ROWS))
+    assert response.json() == ROWS
+
+
+@pytest.mark.parametrize("path, accept_encoding", [
+    ("/small", "gzip"),
+    ("/binary", "gzip"),
+    ("/large", "identity"),
+    ("/large", "gzip;q=0"),
+])
+def test_response_sent_as_is(path, accept_encoding):
+    response = client.get(path, headers={"Accept-Encoding": accept_encoding})
+    assert "content-encoding" not in response.headers
+
+
+def test_stream_is_gzipped():
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert [orjson.loads(line) for line in response.text.splitlines()] \
+        == ROWS
+
+
+def test_stream_is_compressed_incrementally():
+    middleware = CompressionMiddleware(
+        compressed_app, minimum_size=500,
+        media_types=["application/x-ndjson"],
+    )
+    scope = {
+        "type": "http", "method": "GET", "path": "/stream",
+        "headers": [(b"accept-encoding", b"gzip")], "query_string": b"",
+    }
+    messages = []
+
+    async def receive():
+        await asyncio.Event().wait()    # the client never disconnects
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(middleware(scope, receive, send))
+
+    bodies = [m for m in messages if m["type"] == "http.response.body"]
+    assert len(bodies) > 100
+    decompress = zlib.decompressobj(31)
+    # Every chunk is flushed: it decompresses before the stream ends.
+    first = decompress.decompress(bodies[0]["body"])
+    assert len(first) >= 500 and first.endswith(b"\n")
+    rest = b"".join(decompress.decompress(m["body"]) for m in bodies[1:])
+    assert (first + rest).decode().splitlines() == \
+        [orjson.dumps(row).decode() for row in ROWS]
+
+
+def test_preferred_encoding():
+    assert preferred_encoding("gzip, br", ("br", "gzip")) == "br"
+    assert preferred_encoding("br;q=0.5, gzip", ("br", "gzip")) == "gzip"
+    assert preferred_encoding("*", ("gzip",)) == "gzip"
+    assert preferred_encoding("*, gzip;q=0", ("gzip",)) is None
+    assert preferred_encoding("", ("gzip",)) is None
@@ -0,0 +1,211 @@
+import json
+import time
+from typing import Any, Dict, List
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import bindparam, select
+from sqlalchemy.sql import ClauseElement
+
+from app.config import config
+from app.controllers import helpers
+from app.controllers.helpers import (
+    CountQuery, OffsetQuery, count_cache_key, count_rows,
+    invalidate_count_cache, paginate_offset
+)
+from app.database.depends import create_read_session
+from app.database.models import Customer
+from app.main import app
+from app.utils.auth import depend_customer_access_token
+
+from .helpers import StubSession, authorized, create_session_override
+from .test_projections import projected_row
+
+
+class CountSession(StubSession):
+    """Answers COUNT(*) with ``total``, EXPLAIN with a ``total`` row
+    estimate and anything else with ``rows``."""
+
+    def __init__(self, total: int = 0, rows: List[Any] = ()):
+        super().__init__()
+        self.total = total
+        self.rows = list(rows)
+
+    @property
+    def sql(self) -> List[str]:
+        return [str(stmt) for stmt in self.statements]
+
+    def answer(self, stmt, params):
+        sql = str(stmt)
+        if sql.startswith("EXPLAIN"):
+            return [(json.dumps([{"Plan": {"Plan Rows": self.total}}]),)]
+        if "count(*)" in sql:
+            return [(self.total,)]
+        return self.rows
+
+
+CUSTOMERS = CountQuery(select(Customer.id).order_by(Customer.id), "customer")
+
+
+@pytest.fixture
+def count_strategy(monkeypatch):
+    def set_strategy(strategy: str) -> None:
+        monkeypatch.setattr(config.paging, "COUNT_STRATEGY", strategy)
+    return set_strategy
+
+
+@pytest.mark.asyncio
+async def test_exact_count(count_strategy):
+    count_strategy("exact")
+    db = CountSession(total=42)
+
+    assert await count_rows(db, CUSTOMERS) == 42
+    assert "count(*)" in db.sql[0]
+    assert "ORDER BY" not in db.sql[0]
+
+
+@pytest.mark.asyncio
+async def test_estimated_count(count_strategy):
+    count_strategy("estimated")
+    db = CountSession(total=1000)
+
+    assert await count_rows(db, CUSTOMERS) == 1000
+    assert db.sql[0].startswith("EXPLAIN (FORMAT JSON) SELECT")
+
+
+@pytest.mark.asyncio
+async def test_no_count(count_strategy):
+    count_strategy("none")
+    db = CountSession(total=42)
+
+    assert await count_rows(db, CUSTOMERS) is None
+    assert db.sql == []
+
+
+@pytest.mark.asyncio
+async def test_cached_count_hits_redis(count_strategy, redis):
+    count_strategy("cached")
+    db = CountSession(total=42)
+
+    assert await count_rows(db, CUSTOMERS) == 42
+    db.total = 43
+    assert await count_rows(db, CUSTOMERS) == 42
+    assert len(db.sql) == 1
+    assert await redis.ttl(count_cache_key("customer")) > 0
+
+
+@pytest.mark.asyncio
+async def test_cached_count_expires(count_strategy, redis, monkeypatch):
+    count_strategy("cached")
+    db = CountSession(total=42)
+    await count_rows(db, CUSTOMERS)
+
+    db.total = 43
+    later = time.time() + config.paging.COUNT_CACHE_TTL
+    monkeypatch.setattr(helpers.time, "time", lambda: later)
+    assert await count_rows(db, CUSTOMERS) == 43
+
+
+@pytest.mark.asyncio
+async def test_cached_count_invalidated(count_strategy, redis):
+    count_strategy("cached")
+    db = CountSession(total=42)
+    await count_rows(db, CUSTOMERS)
+
+    db.total = 43
+    await invalidate_count_cache("customer")
+    assert await count_rows(db, CUSTOMERS) == 43
+    assert len(db.sql) == 2
+
+
+class PreparedSession(StubSession):
+    """Answers only the statements ``query`` prepared, without compiling
+    anything."""
+
+    def __init__(self, query: CountQuery, totals: Dict[int, int]):
+        super().__init__()
+        self.query = query
+        self.totals = totals
+        self.params: List[Dict[str, Any]] = []
+
+    def answer(self, stmt, params):
+        self.params.append(params)
+        total = self.totals[params["device_id"]]
+        if stmt is self.query.explain:
+            return [([{"Plan": {"Plan Rows": total}}],)]
+        assert stmt is self.query.exact
+        return [(total,)]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("strategy", ["exact", "estimated", "cached"])
+async def test_counts_reuse_prepared_statements(
+        count_strategy, redis, monkeypatch, strategy):
+    count_strategy(strategy)
+    query = CountQuery(
+        select(Customer.id).where(
+            Customer.device_id == bindparam("device_id")),
+        "customer",
+    )
+    db = PreparedSession(query, totals={1: 3, 2: 5})
+
+    def compile(*args, **kwargs):
+        raise AssertionError("statement compiled per request")
+    monkeypatch.setattr(ClauseElement, "compile", compile)
+
+    assert await count_rows(db, query, device_id=1) == 3
+    assert await count_rows(db, query, device_id=2) == 5
+    assert await count_rows(db, query, device_id=1) == 3
+    if strategy == "cached":
+        # One count per parameter set; the third call is a cache hit.
+        assert len(db.statements) == 2
+        assert len(await redis.hkeys(count_cache_key("customer"))) == 2
+    else:
+        assert [p["device_id"] for p in db.params] == [1, 2, 1]
+
+
+def test_estimate_binds_statement_parameters():
+    query = CountQuery(
+        select(Customer.id).where(Customer.group == 4).where(
+            Customer.device_id == bindparam("device_id")),
+        "customer",
+    )
+    sql = str(query.explain)
+
+    assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT")
+    assert ":device_id" in sql and "4" not in sql
+    assert query.explain.compile().params["group_1"] == 4
+
+
+@pytest.mark.asyncio
+async def test_paginate_offset(count_strategy):
+    count_strategy("exact")
+    db = CountSession(total=5, rows=[(1,), (2,), (3,)])
+
+    query = OffsetQuery(
+        select(Customer.id).order_by(Customer.id), "customer",
+        build=lambda row: row[0], count_stmt=select(Customer.email),
+    )
+    page = await paginate_offset(db, query, page=2, size=2)
+
+    assert page.records == [1, 2]
+    assert page.has_next and page.offset == 2 and page.total == 5
+    assert "LIMIT" in db.sql[0] and "OFFSET" in db.sql[0]
+    assert "email" in db.sql[1]
+
+
+def test_paged_route_sends_total(count_strategy, override_dependency):
+    count_strategy("exact")
+    rows = [projected_row((True, False, 1)) for _ in range(3)]
+    db = CountSession(total=3, rows=rows)
+    override_dependency(create_read_session, create_session_override(db))
+    override_dependency(depend_customer_access_token, authorized)
+
+    response = TestClient(app).get(
+        f"{config.OPENAPI_PREFIX}/customer/paged?page=1&per_page=2")
+
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+    assert response.headers["X-Total-Count"] == "3"
+    assert response.headers["X-Page-Count"] == "2"
+    assert 'rel="next"' in response.headers["Link"]
@@ -0,0 +1,63 @@
+from typing import List
+
+import pytest
+
+from app.controllers.devices import device_exists, device_exists_cache
+
+from .helpers import StubSession
+
+
+class DeviceSession(StubSession):
+    """Session on a database holding devices ``device_ids``."""
+
+    def __init__(self, device_ids: List[int]):
+        super().__init__()
+        self.device_ids = device_ids
+
+    @property
+    def queries(self) -> int:
+        return len(self.statements)
+
+    def answer(self, stmt, params):
+        return [(i,) for i in params["ids"] if i in self.device_ids]
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    device_exists_cache.clear()
+    yield
+    device_exists_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_reads_answer_from_cache():
+    db = DeviceSession(device_ids=[1])
+
+    assert await device_exists(db, 1)
+    assert not await device_exists(db, 2)
+    assert await device_exists(db, 1)
+    assert not await device_exists(db, 2)
+    assert db.queries == 2
+
+
+@pytest.mark.asyncio
+async def test_primary_rechecks_negatives_from_replica():
+    replica = DeviceSession(device_ids=[])
+    primary = DeviceSession(device_ids=[1])
+
+    # The replica has not seen device 1 yet; a read caches the miss.
+    assert not await device_exists(replica, 1)
+    assert await device_exists(primary, 1, on_primary=True)
+    assert primary.queries == 1
+    # The primary's answer replaces the cached miss.
+    assert await device_exists(replica, 1)
+    assert replica.queries == 1
+
+
+@pytest.mark.asyncio
+async def test_primary_trusts_cached_positives():
+    primary = DeviceSession(device_ids=[1])
+    device_exists_cache.set(1, True)
+
+    assert await device_exists(primary, 1, on_primary=True)
+    assert primary.queries == 0
@@ -0,0 +1,68 @@
+from collections import namedtuple
+from typing import List
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import config
+from app.database.depends import create_session
+from app.main import app
+
+from .helpers import StubSession, create_session_override
+
+STATUS_URL = f"{config.OPENAPI_PREFIX}/device/status"
+
+DeviceRow = namedtuple("DeviceRow", "id is_active is_delete")
+
+
+class StatusSession(StubSession):
+    """Holds devices ``device_ids`` and applies status UPDATEs to them."""
+
+    def __init__(self, device_ids: List[int]):
+        super().__init__()
+        self.device_ids = device_ids
+
+    def answer(self, stmt, params):
+        values = stmt.compile().params
+        return [
+            DeviceRow(i, values.get("is_active", True),
+                      values.get("is_delete", False))
+            for i in values["ids"] if i in self.device_ids
+        ]
+
+
+@pytest.fixture
+def status_client(redis, override_dependency):
+    db = StatusSession(device_ids=[1, 2])
+    override_dependency(create_session, create_session_override(db))
+    return TestClient(app), db
+
+
+def test_update_status_reports_missing_ids(status_client):
+    client, db = status_client
+    response = client.patch(
+        STATUS_URL, json={"ids": [1, 3, 2], "is_active": False})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["updated"] == [
+        {"id": 1, "is_active": False, "is_delete": False},
+        {"id": 2, "is_active": False, "is_delete": False},
+    ]
+    assert body["missing"] == [3]
+    assert len(db.statements) == 1
+
+
+@pytest.mark.parametrize("data", [
+    {"ids": [], "is_active": True},
+    {"ids": [1]},
+    {"ids": [1], "is_active": True, "name": "x"},
+    {"ids": list(range(config.bulk.BULK_MAX_RECORDS + 1)),
+     "is_active": True},
+])
+def test_update_status_rejects_invalid_request(status_client, data):
+    client, db = status_client
+    response = client.patch(STATUS_URL, json=data)
+
+    assert response.status_code == 422
+    assert db.statements == []
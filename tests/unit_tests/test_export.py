@@ -0,0 +1,160 @@
+import asyncio
+import csv
+import io
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Sequence
+
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import config
+from app.controllers.customers import EXPORT_COLUMNS
+from app.database.depends import create_read_session
+from app.main import app
+from app.utils.auth import depend_customer_access_token
+from app.utils.export import csv_chunks, customer_ndjson_chunks
+
+from .helpers import authorized, create_session_override
+
+FIELDNAMES = [c.key for c in EXPORT_COLUMNS]
+EXPORT_URL = f"{config.OPENAPI_PREFIX}/customer/export"
+
+
+class ExportRow(tuple):
+    """Positional row with the ``_mapping`` of a SQLAlchemy ``Row``."""
+
+    @property
+    def _mapping(self) -> Dict[str, Any]:
+        return dict(zip(FIELDNAMES, self))
+
+
+def export_row(id: int, **values: Any) -> ExportRow:
+    now = datetime(2022, 8, 11, 12, 30)
+    row = {
+        "id": id, "email": f"user{id}@example.com", "phone": "+84123234345",
+        "prefix": "+84", "first_name": "Phuc", "last_name": "Cao",
+        "gender": "MALE", "birth_date": datetime(2022, 8, 11),
+        "address": "string", "weight": 64, "height": 164, "group": 1,
+        "device_id": id, "created": now, "modified": now,
+        "device_is_active": True, "device_is_delete": False, **values,
+    }
+    return ExportRow(row[name] for name in FIELDNAMES)
+
+
+async def partitions(*chunks: Sequence[ExportRow]) -> AsyncIterator:
+    for chunk in chunks:
+        yield chunk
+
+
+def collect(chunks: AsyncIterator[bytes]) -> List[bytes]:
+    async def _collect():
+        return [chunk async for chunk in chunks]
+    return asyncio.run(_collect())
+
+
+def test_ndjson_chunk_per_partition():
+    chunks = collect(customer_ndjson_chunks(partitions(
+        [export_row(1), export_row(2)], [export_row(3)])))
+
+    assert len(chunks) == 2
+    records = [orjson.loads(line) for line in b"".join(chunks).splitlines()]
+    assert [r["id"] for r in records] == [1, 2, 3]
+    assert records[0]["birth_date"] == "2022-08-11"
+    assert records[0]["device"] == \
+        {"id": 1, "is_active": True, "is_delete": False}
+    assert "device_is_active" not in records[0]
+
+
+def test_ndjson_customer_without_device():
+    chunks = collect(customer_ndjson_chunks(partitions([export_row(
+        1, device_id=None, device_is_active=None, device_is_delete=None)])))
+
+    assert orjson.loads(chunks[0])["device"] is None
+
+
+def test_ndjson_empty_export():
+    assert collect(customer_ndjson_chunks(partitions())) == []
+
+
+def test_csv_header_then_chunk_per_partition():
+    chunks = collect(csv_chunks(
+        partitions([export_row(1)], [export_row(2), export_row(3)]),
+        FIELDNAMES))
+
+    assert len(chunks) == 3
+    assert chunks[0] == (",".join(FIELDNAMES) + "\r\n").encode()
+    rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode())))
+    assert [r["id"] for r in rows] == ["1", "2", "3"]
+
+
+def test_csv_escaping():
+    address = 'Flat 1, "Blue" House\nLine 2'
+    chunks = collect(csv_chunks(
+        partitions([export_row(1, address=address)]), FIELDNAMES))
+
+    assert b'"Flat 1, ""Blue"" House\nLine 2"' in chunks[1]
+    rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode())))
+    assert rows[0]["address"] == address
+
+
+def test_csv_empty_export_is_header_only():
+    chunks = collect(csv_chunks(partitions(), FIELDNAMES))
+    assert chunks == [(",".join(FIELDNAMES) + "\r\n").encode()]
+
+
+class StreamResult:
+    def __init__(self, rows: List[ExportRow]):
+        self.rows = rows
+
+    async def partitions(self, size: int) -> AsyncIterator[List[ExportRow]]:
+        for start in range(0, len(self.rows), size):
+            yield self.rows[start:start + size]
+
+
+class StreamSession:
+    def __init__(self, rows: List[ExportRow]):
+        self.rows = rows
+
+    async def stream(self, stmt):
+        return StreamResult(self.rows)
+
+
+@pytest.fixture
+def export_client(monkeypatch, override_dependency):
+    monkeypatch.setattr(config.paging, "EXPORT_YIELD_PER", 2)
+    db = StreamSession([export_row(i) for i in range(1, 6)])
+    override_dependency(create_read_session, create_session_override(db))
+    override_dependency(depend_customer_access_token, authorized)
+    return TestClient(app)
+
+
+def test_export_ndjson(export_client):
+    response = export_client.get(EXPORT_URL)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-disposition"] == \
+        'attachment; filename="customers.ndjson"'
+    assert [orjson.loads(line)["id"] for line in response.text.splitlines()] \
+        == [1, 2, 3, 4, 5]
+    # Queries run while the body streams, after the headers are sent.
+    assert "server-timing" not in response.headers
+
+
+def test_export_csv(export_client):
+    response = export_client.get(f"{EXPORT_URL}?format=csv")
+
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [r["id"] for r in rows] == ["1", "2", "3", "4", "5"]
+
+
+def test_export_rejects_unknown_format(export_client):
+    response = export_client.get(f"{EXPORT_URL}?format=xml")
+    assert response.status_code == 422
+
+
+def test_buffered_response_has_server_timing():
+    response = TestClient(app).get(f"{config.OPENAPI_PREFIX}/health")
+    assert 'desc="0 queries"' in response.headers["server-timing"]
@@ -0,0 +1,95 @@
+import asyncio
+import threading
+
+import pytest
+from passlib.context import CryptContext
+
+from app.config import PasswordHashSetting
+from app.exceptions.configure_exceptions import ServiceUnavailableException
+from app.utils.hashing import (
+    BCRYPT_MAX_ROUNDS, BCRYPT_MIN_ROUNDS, HashWorkerPool,
+    calibrate_bcrypt_rounds, context_options
+)
+
+
+@pytest.mark.asyncio
+async def test_hash_pool_runs_in_worker():
+    pool = HashWorkerPool(max_workers=1, max_queue=0)
+
+    assert await pool.run(lambda x: x * 2, 21) == 42
+    assert pool.stats()["completed"] == 1
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_hash_pool_rejects_when_queue_full():
+    pool = HashWorkerPool(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    tasks = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+    await asyncio.sleep(0.05)
+
+    with pytest.raises(ServiceUnavailableException):
+        await pool.run(release.wait)
+    assert pool.stats()["queue_depth"] == 1
+    assert pool.stats()["rejected"] == 1
+
+    release.set()
+    await asyncio.gather(*tasks)
+    pool.shutdown()
+
+
+def test_pwd_context_flags_outdated_hashes():
+    settings = PasswordHashSetting(PASSWORD_HASH_SCHEME="bcrypt")
+    old = CryptContext(**context_options(settings, 10, 1))
+    new = CryptContext(**context_options(settings, 11, 1))
+    stored = old.hash("string123")
+
+    assert not old.needs_update(stored)
+    assert new.needs_update(stored)
+    verified, new_hash = new.verify_and_update("string123", stored)
+    assert verified and new_hash.startswith("$2b$11$")
+
+
+def test_calibrate_bcrypt_rounds_within_bounds():
+    assert calibrate_bcrypt_rounds(0) == BCRYPT_MIN_ROUNDS
+    assert BCRYPT_MIN_ROUNDS <= calibrate_bcrypt_rounds(0.2) \
+        <= BCRYPT_MAX_ROUNDS
+
+
+@pytest.mark.asyncio
+async def test_hash_pool_map_leaves_workers_free():
+    pool = HashWorkerPool(max_workers=4, max_queue=0)
+    release = threading.Event()
+    bulk = [asyncio.ensure_future(pool.map(release.wait, [None] * 4))
+            for _ in range(2)]
+    await asyncio.sleep(0.05)
+
+    # Both bulk jobs together hold half of the workers.
+    assert pool.stats()["running"] == pool.bulk_workers == 2
+    assert await pool.run(lambda x: x * 2, 21) == 42
+
+    release.set()
+    assert all(all(done) for done in await asyncio.gather(*bulk))
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_hash_pool_map_cancels_rest_on_failure():
+    pool = HashWorkerPool(max_workers=2, max_queue=0)
+    done = []
+
+    def hash_item(item):
+        if item == 0:
+            raise ServiceUnavailableException("Password hashing queue is full")
+        done.append(item)
+        return item
+
+    with pytest.raises(ServiceUnavailableException):
+        await pool.map(hash_item, list(range(10)))
+    await asyncio.sleep(0.05)
+
+    # One bulk worker: the first item failed before any other started.
+    assert done == []
+    assert pool.queue_depth == 0
+    pool.shutdown()
@@ -2,9 +2,16 @@
 from app.main import app
 from fastapi.testclient import TestClient
 
+from .helpers import assert_max_queries
+
 client = TestClient(app)
 
 
 def test_health():
     response = client.get('/api/v1beta1/health')
     assert response.text == "Ok"
+
+
+def test_health_runs_no_queries():
+    response = client.get('/api/v1beta1/health')
+    assert_max_queries(response, 0)
@@ -0,0 +1,25 @@
+import time
+
+from app.utils.local_cache import TTLCache
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache("test", maxsize=2, ttl=60)
+    cache.set(1, True)
+    cache.set(2, False)
+    assert cache.get(1) is True
+    cache.set(3, True)
+
+    assert cache.get(2) is None
+    assert cache.get(1) is True
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache("test", maxsize=10, ttl=60)
+    cache.set(1, False, ttl=0.01)
+    time.sleep(0.02)
+
+    assert cache.get(1) is None
+    assert len(cache) == 0
@@ -0,0 +1,86 @@
+from collections import namedtuple
+from typing import List, Optional
+
+import pytest
+
+from app import controllers
+from app.exceptions.configure_exceptions import CustomerNotFound
+from app.schemas import ReqLoginSchema
+from app.utils.auth import PasswordHandle
+
+from .helpers import StubSession
+
+LoginRow = namedtuple("LoginRow", "id password phone first_name last_name")
+CUSTOMER = LoginRow(7, "old-hash", "+84123234345", "Phuc", "Cao")
+LOGIN = ReqLoginSchema(email="user1@example.com", password="string123")
+
+
+class LoginSession(StubSession):
+    """Records what the session does and whether it holds a connection."""
+
+    def __init__(self, customer: Optional[LoginRow]):
+        super().__init__()
+        self.customer = customer
+        self.events: List[str] = []
+        self.connected = False
+
+    def answer(self, stmt, params):
+        self.connected = True
+        self.events.append(stmt.__visit_name__)
+        return [self.customer] if self.customer else []
+
+    async def commit(self):
+        await super().commit()
+        self.events.append("commit")
+        self.connected = False
+
+    async def close(self):
+        self.events.append("close")
+        self.connected = False
+
+
+@pytest.fixture
+def hashing(monkeypatch):
+    """Fake password verification; reports the session state while the
+    password hashes, and rehashes when ``new_hash`` is set."""
+    calls = []
+    new_hash = {"value": None}
+
+    async def verify_password(self, plain_password, hashed_password):
+        calls.append(db.connected)
+        return new_hash["value"]
+
+    monkeypatch.setattr(PasswordHandle, "verify_password", verify_password)
+    db = LoginSession(CUSTOMER)
+    return db, calls, new_hash
+
+
+@pytest.mark.asyncio
+async def test_login_hashes_without_holding_a_connection(hashing, redis):
+    db, calls, _ = hashing
+
+    response = await controllers.customers.login(db, LOGIN, redis)
+
+    assert response.access_token and response.refresh_token
+    assert calls == [False]
+    assert db.events == ["select", "close"]
+
+
+@pytest.mark.asyncio
+async def test_login_rehash_reopens_for_update(hashing, redis):
+    db, calls, new_hash = hashing
+    new_hash["value"] = "new-hash"
+
+    await controllers.customers.login(db, LOGIN, redis)
+
+    assert calls == [False]
+    assert db.events == ["select", "close", "update", "commit"]
+
+
+@pytest.mark.asyncio
+async def test_login_unknown_customer(redis):
+    db = LoginSession(None)
+
+    with pytest.raises(CustomerNotFound):
+        await controllers.customers.login(db, LOGIN, redis)
+    assert db.events == ["select", "close"]
@@ -0,0 +1,35 @@
+
+from app.main import app
+from fastapi.testclient import TestClient
+
+client = TestClient(app)
+
+
+def test_metrics_records_route_latency():
+    client.get('/api/v1beta1/health')
+    response = client.get('/metrics')
+
+    assert response.status_code == 200
+    assert 'http_request_duration_seconds_count{method="GET",' \
+        'route="/api/v1beta1/health",status="200"}' in response.text
+
+
+def test_db_pool_stats():
+    response = client.get('/metrics/db-pool')
+    primary = response.json()['pools']['primary-writes']
+
+    assert response.status_code == 200
+    assert primary['checked_out'] == 0
+    assert 'wait_seconds_max' in primary
+
+
+def test_password_hash_stats():
+    response = client.get('/metrics/password-hash')
+
+    assert response.status_code == 200
+    assert response.json()['workers'] >= 1
+
+
+def test_worker_stats_not_under_api_prefix():
+    for path in ('db-pool', 'password-hash'):
+        assert client.get(f'/api/v1beta1/health/{path}').status_code == 404
@@ -0,0 +1,79 @@
+import gzip
+
+from app.main import app, openapi_artifact
+from app.scripts.build_openapi import build
+from app.utils.openapi import OpenAPIArtifact
+from fastapi.testclient import TestClient
+
+client = TestClient(app)
+
+OPENAPI_URL = '/api/v1beta1/openapi.json'
+
+
+def test_openapi_served_with_etag():
+    response = client.get(OPENAPI_URL, headers={"Accept-Encoding": ""})
+
+    assert response.status_code == 200
+    assert response.headers["etag"] == openapi_artifact().etag
+    assert "content-encoding" not in response.headers
+    assert "/api/v1beta1/customer" in response.json()["paths"]
+
+
+def test_openapi_not_modified():
+    etag = client.get(OPENAPI_URL).headers["etag"]
+
+    for if_none_match in (etag, f'"other", W/{etag}', "*"):
+        response = client.get(
+            OPENAPI_URL, headers={"If-None-Match": if_none_match})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+    response = client.get(OPENAPI_URL, headers={"If-None-Match": '"other"'})
+    assert response.status_code == 200
+
+
+def test_openapi_served_gzipped():
+    response = client.get(
+        OPENAPI_URL, headers={"Accept-Encoding": "br, gzip;q=0.5"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == openapi_artifact().gzip_etag
+    assert response.content == openapi_artifact().body
+    assert gzip.decompress(openapi_artifact().gzipped) == \
+        openapi_artifact().body
+
+
+def test_openapi_encodings_have_own_etags():
+    plain = client.get(OPENAPI_URL, headers={"Accept-Encoding": ""})
+    gzipped = client.get(OPENAPI_URL, headers={"Accept-Encoding": "gzip"})
+
+    assert plain.headers["etag"] != gzipped.headers["etag"]
+    assert gzipped.headers["etag"] == \
+        plain.headers["etag"][:-1] + '-gz"'
+
+    # Either tag revalidates; the 304 carries the tag of the encoding
+    # the client would get.
+    for etag in (plain.headers["etag"], gzipped.headers["etag"]):
+        response = client.get(OPENAPI_URL, headers={
+            "If-None-Match": etag, "Accept-Encoding": "gzip"})
+        assert response.status_code == 304
+        assert response.headers["etag"] == gzipped.headers["etag"]
+
+        response = client.get(OPENAPI_URL, headers={
+            "If-None-Match": etag, "Accept-Encoding": ""})
+        assert response.status_code == 304
+        assert response.headers["etag"] == plain.headers["etag"]
+
+
+def test_swagger_json_is_the_same_artifact():
+    response = client.get(
+        '/api/v1beta1/swagger.json', headers={"Accept-Encoding": ""})
+    assert response.headers["etag"] == openapi_artifact().etag
+
+
+def test_built_artifact_matches_served_one(tmp_path):
+    output = tmp_path / "openapi.json"
+    build(str(output))
+
+    assert OpenAPIArtifact.load(str(output)) == openapi_artifact()
@@ -0,0 +1,47 @@
+import pytest
+
+from app.apis.custom_types import CursorPaginationResponseHeaders
+from app.controllers.helpers import decode_cursor, encode_cursor
+from app.exceptions.configure_exceptions import InvalidCursor
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(id=42)) == {"id": 42}
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor(id="1")])
+def test_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+def test_cursor_link_header():
+    next_cursor = encode_cursor(id=2)
+    headers = CursorPaginationResponseHeaders(
+        url="http://test/api/device?per_page=2&cursor=abc",
+        size=2, cursor="abc", next_cursor=next_cursor,
+    ).headers()
+
+    assert f'cursor={next_cursor}&per_page=2>; rel="next"' in headers["Link"]
+    assert '<http://test/api/device?per_page=2>; rel="first"' \
+        in headers["Link"]
+
+
+def test_page_headers_without_total():
+    from app.apis.custom_types import PaginationResponseHeaders
+
+    headers = PaginationResponseHeaders(
+        url="http://test/api/customer?page=2&per_page=10",
+        page=2, size=10, total=None, has_next=True,
+    ).headers()
+
+    assert "X-Total-Count" not in headers
+    assert 'rel="last"' not in headers["Link"]
+    assert "page=3&per_page=10>; rel=\"next\"" in headers["Link"]
+
+
+def test_link_headers_base_is_abstract():
+    from app.apis.custom_types import LinkResponseHeaders
+
+    with pytest.raises(TypeError):
+        LinkResponseHeaders(url="http://test/api/device")
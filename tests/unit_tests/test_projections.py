@@ -0,0 +1,36 @@
+import json
+from datetime import datetime
+
+import orjson
+
+from app.controllers.customers import CUSTOMER_PROJECTION
+from app.schemas import CustomerObj
+from app.utils.serialization import field_plan
+
+from .helpers import load_data
+
+
+def projected_row(device):
+    data = {**load_data("customers")[0], "birth_date": datetime(2022, 8, 11)}
+    values = {**data, "id": 7}
+    return tuple(values[f] for f in CUSTOMER_PROJECTION.own_fields) + device
+
+
+def test_projection_never_selects_password():
+    selected = {c.key for c in CUSTOMER_PROJECTION.select().selected_columns}
+    assert "password" not in selected
+
+
+def test_projected_rows_serialize_like_schema():
+    row = CUSTOMER_PROJECTION.build(projected_row((True, False, 1)))
+    body = orjson.loads(field_plan(CustomerObj).dumps([row]))
+
+    assert body == [json.loads(CustomerObj.from_orm(row).json())]
+    assert body[0]["device"] == \
+        {"is_active": True, "is_delete": False, "id": 1}
+
+
+def test_projected_row_without_device():
+    row = CUSTOMER_PROJECTION.build(projected_row((None, None, None)))
+    assert row.device is None
+    assert row.id == 7
@@ -0,0 +1,72 @@
+import asyncio
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.config import config
+from app.database.config import BaseModel
+from app.database.depends import create_cached_read_session
+from app.database.models import Devices
+from app.database.query_stats import track_queries
+from app.main import app
+
+from .helpers import assert_max_queries
+
+DEVICES_URL = f"{config.OPENAPI_PREFIX}/device"
+
+
+@pytest.fixture
+def sqlite_client(redis, override_dependency):
+    """The app on an in-memory SQLite database holding three devices."""
+    engine = create_async_engine(
+        "sqlite+aiosqlite://", poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+    track_queries(engine)
+
+    async def setup():
+        async with engine.begin() as conn:
+            await conn.run_sync(BaseModel.metadata.create_all)
+            await conn.execute(insert(Devices), [
+                {"is_active": True, "is_delete": False} for _ in range(3)
+            ])
+    asyncio.run(setup())
+
+    Session = sessionmaker(bind=engine, class_=AsyncSession)
+
+    async def read_session():
+        async with Session() as session:
+            yield session
+
+    override_dependency(create_cached_read_session, read_session)
+    yield TestClient(app)
+    asyncio.run(engine.dispose())
+
+
+def db_queries(response) -> int:
+    timing = response.headers["Server-Timing"]
+    assert re.search(r"db;dur=\d+\.\d{2};", timing)
+    assert re.search(r"app;dur=\d+\.\d{2}$", timing)
+    return int(re.search(r'desc="(\d+) queries"', timing).group(1))
+
+
+def test_server_timing_counts_executed_statements(sqlite_client):
+    response = sqlite_client.get(f"{DEVICES_URL}?per_page=2")
+
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+    assert db_queries(response) == 1
+    assert_max_queries(response, 1)
+
+
+def test_cached_page_runs_no_statements(sqlite_client):
+    sqlite_client.get(DEVICES_URL)
+    response = sqlite_client.get(DEVICES_URL)
+
+    assert len(response.json()) == 3
+    assert db_queries(response) == 0
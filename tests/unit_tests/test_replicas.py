@@ -0,0 +1,102 @@
+import time
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app import resources
+from app.config import config
+from app.database.depends import (
+    PRIMARY_PIN_COOKIE, bulkhead, create_cached_read_session,
+    create_read_session, pin_to_primary, pinned_to_primary, route_bulkhead
+)
+from app.database.replicas import ReplicaSet
+from app.main import app
+
+
+def make_replicas(count, eject_seconds=30):
+    return ReplicaSet(
+        [create_async_engine(f"postgresql+asyncpg://replica-{i}/db")
+         for i in range(count)],
+        eject_seconds=eject_seconds,
+    )
+
+
+def test_replica_set_round_robin():
+    replicas = make_replicas(2)
+    first, second = replicas.engines
+
+    assert [replicas.choose() for _ in range(4)] == \
+        [first, second, first, second]
+
+
+def test_replica_set_skips_ejected_replicas():
+    replicas = make_replicas(2, eject_seconds=0.01)
+    first, second = replicas.engines
+    replicas.eject(first)
+
+    assert [replicas.choose() for _ in range(3)] == [second] * 3
+
+    replicas.eject(second)
+    assert replicas.choose() is None
+
+    time.sleep(0.02)
+    assert replicas.choose() is not None
+
+
+def test_pin_to_primary_cookie():
+    response = Response()
+    pin_to_primary(response)
+    cookie = response.headers["set-cookie"]
+    assert cookie.startswith(f"{PRIMARY_PIN_COOKIE}=")
+
+    value = cookie.split(";")[0].split("=")[1]
+    pinned = Request({
+        "type": "http",
+        "headers": [(b"cookie", f"{PRIMARY_PIN_COOKIE}={value}".encode())],
+    })
+    expired = Request({
+        "type": "http",
+        "headers": [(b"cookie", f"{PRIMARY_PIN_COOKIE}=1".encode())],
+    })
+    assert pinned_to_primary(pinned)
+    assert not pinned_to_primary(expired)
+    assert not pinned_to_primary(Request({"type": "http", "headers": []}))
+
+
+def test_route_bulkhead_defaults_by_method():
+    get = Request({"type": "http", "method": "GET", "headers": []})
+    post = Request({"type": "http", "method": "POST", "headers": []})
+    assert route_bulkhead(get) == "reads"
+    assert route_bulkhead(post) == "writes"
+
+    bulkhead("auth")(post)
+    assert route_bulkhead(post) == "auth"
+
+
+@pytest.mark.asyncio
+async def test_cached_reads_stay_on_primary(monkeypatch):
+    primary = create_async_engine("postgresql+asyncpg://primary/db")
+    registry = resources.Resources(config)
+    registry.__dict__["bulkheads"] = {"reads": primary}
+    registry.__dict__["replicas"] = make_replicas(1)
+    monkeypatch.setattr(resources, "_resources", registry)
+    request = Request({"type": "http", "method": "GET", "headers": []})
+
+    async for session in create_read_session(request):
+        assert session.bind is registry.replicas.engines[0]
+    # A page cached from a lagging replica would outlive the write that
+    # invalidated the cache.
+    async for session in create_cached_read_session(request):
+        assert session.bind is primary
+
+
+@pytest.mark.parametrize("path", ["/device", "/customer/device/{device_id}"])
+def test_cached_routes_read_from_primary(path):
+    route = next(r for r in app.routes
+                 if getattr(r, "path", None) == config.OPENAPI_PREFIX + path
+                 and "GET" in r.methods)
+    calls = {d.call for d in route.dependant.dependencies}
+    assert create_cached_read_session in calls
+    assert create_read_session not in calls
@@ -0,0 +1,58 @@
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from app import resources
+from app.config import DatabaseServiceConfig, config, get_config
+from app.resources import close_resources, get_resources
+
+
+def test_settings_are_read_once():
+    from app.apis.custom_types import config as paging_config
+    from app.database.config import config as db_config
+
+    assert get_config() is config
+    assert db_config is config.db
+    assert paging_config is config.paging
+
+
+def test_import_opens_no_resources():
+    subprocess.run([sys.executable, "-c", (
+        "import sys, app.main\n"
+        "from app import resources\n"
+        "assert resources._resources is None\n"
+        "assert 'asyncpg' not in sys.modules\n"
+    )], check=True)
+
+
+@pytest.mark.asyncio
+async def test_close_resources_disposes_registry():
+    registry = get_resources()
+    registry.start()
+    assert set(resources.pools()) >= {"primary-reads", "primary-writes"}
+
+    await close_resources()
+
+    assert resources._resources is None
+    assert resources.pools() == {}
+    with pytest.raises(RuntimeError):
+        registry.hash_pool._executor.submit(print)
+    assert get_resources() is not registry
+
+
+@pytest.mark.asyncio
+async def test_bulkheads_without_connections_share_a_pool():
+    db = DatabaseServiceConfig(
+        DATABASE_URI=config.db.DATABASE_URI,
+        DATABASE_CONNECTION_BUDGET=2, WEB_CONCURRENCY=1)
+    registry = resources.Resources(SimpleNamespace(db=db))
+
+    bulkheads = registry.bulkheads
+
+    assert bulkheads["auth"] is bulkheads["writes"]
+    assert bulkheads["reads"] is not bulkheads["writes"]
+    assert sum(engine.pool.size() + engine.pool._max_overflow
+               for engine in set(bulkheads.values())) == 2
+    await registry.dispose()
@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+from fakeredis import FakeAsyncRedis, FakeServer
+from redis.exceptions import RedisError
+
+from app.utils import cache
+from app.utils.cache import CachedPage, ResponseCache
+
+NAMESPACE = "devices"
+FIELD = "100:"
+
+
+class Loader:
+    """Counts its calls; each one loads a page numbered after the call."""
+
+    def __init__(self, delay: float = 0.0):
+        self.calls = 0
+        self.delay = delay
+
+    async def __call__(self) -> CachedPage:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return CachedPage(body=f"[{self.calls}]".encode(), next_cursor="c")
+
+
+@pytest.fixture
+def response_cache(redis):
+    return ResponseCache(ttl=60, lock_timeout=1.0, redis=redis)
+
+
+@pytest.mark.asyncio
+async def test_miss_loads_then_hits(response_cache):
+    loader = Loader()
+
+    first = await response_cache.read_through(NAMESPACE, FIELD, loader)
+    second = await response_cache.read_through(NAMESPACE, FIELD, loader)
+
+    assert first == second == CachedPage(body=b"[1]", next_cursor="c")
+    assert loader.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_pages_expire_after_ttl(response_cache, monkeypatch):
+    loader = Loader()
+    await response_cache.read_through(NAMESPACE, FIELD, loader)
+
+    later = cache.time.time() + response_cache.ttl
+    monkeypatch.setattr(cache.time, "time", lambda: later)
+    page = await response_cache.read_through(NAMESPACE, FIELD, loader)
+
+    assert page.body == b"[2]"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load(response_cache):
+    loader = Loader(delay=0.05)
+
+    pages = await asyncio.gather(*(
+        response_cache.read_through(NAMESPACE, FIELD, loader)
+        for _ in range(20)
+    ))
+
+    assert loader.calls == 1
+    assert {page.body for page in pages} == {b"[1]"}
+
+
+@pytest.mark.asyncio
+async def test_lock_lets_one_worker_load(redis):
+    # One cache per worker: no shared in-flight loads, only the lock.
+    workers = [ResponseCache(ttl=60, lock_timeout=1.0, redis=redis)
+               for _ in range(5)]
+    loader = Loader(delay=0.1)
+
+    pages = await asyncio.gather(*(
+        worker.read_through(NAMESPACE, FIELD, loader) for worker in workers
+    ))
+
+    assert loader.calls == 1
+    assert {page.body for page in pages} == {b"[1]"}
+    assert await redis.keys("*/lock/*") == []
+
+
+@pytest.mark.asyncio
+async def test_invalidate_drops_pages(response_cache):
+    loader = Loader()
+    await response_cache.read_through(NAMESPACE, FIELD, loader)
+
+    await response_cache.invalidate(NAMESPACE, "other")
+    page = await response_cache.read_through(NAMESPACE, FIELD, loader)
+
+    assert page.body == b"[2]"
+
+
+@pytest.mark.asyncio
+async def test_load_racing_invalidation_is_not_stored(response_cache):
+    loader = Loader()
+
+    async def stale_loader() -> CachedPage:
+        page = await loader()
+        # A write lands while this page is being read.
+        await response_cache.invalidate(NAMESPACE)
+        return page
+
+    stale = await response_cache.read_through(NAMESPACE, FIELD, stale_loader)
+    fresh = await response_cache.read_through(NAMESPACE, FIELD, loader)
+
+    assert stale.body == b"[1]" and fresh.body == b"[2]"
+
+
+@pytest.mark.asyncio
+async def test_loads_uncached_when_redis_is_down():
+    server = FakeServer()
+    server.connected = False
+    response_cache = ResponseCache(
+        ttl=60, lock_timeout=1.0, redis=FakeAsyncRedis(server=server))
+    loader = Loader()
+
+    page = await response_cache.read_through(NAMESPACE, FIELD, loader)
+
+    assert page.body == b"[1]"
+
+
+@pytest.mark.asyncio
+async def test_page_served_when_store_fails(response_cache, monkeypatch):
+    async def fail(*args):
+        raise RedisError("down")
+
+    monkeypatch.setattr(response_cache, "_set", fail)
+    page = await response_cache.read_through(NAMESPACE, FIELD, Loader())
+
+    assert page.body == b"[1]"
+    assert await response_cache.redis.keys("*/lock/*") == []
@@ -0,0 +1,37 @@
+import json
+from datetime import datetime
+
+import orjson
+import pytest
+
+from app.database.models import Customer, Devices
+from app.schemas import CustomerObj, DeviceObj
+from app.utils.serialization import field_plan
+
+from .helpers import load_data
+
+
+def make_customer(**overrides):
+    data = {**load_data("customers")[0], "birth_date": datetime(2022, 8, 11)}
+    return Customer(id=1, **{**data, **overrides})
+
+
+@pytest.mark.parametrize("row", [
+    make_customer(device=Devices(id=3, is_active=True, is_delete=False)),
+    make_customer(device_id=None, device=None),
+])
+def test_customer_plan_matches_schema(row):
+    expected = json.loads(CustomerObj.from_orm(row).json())
+    assert orjson.loads(field_plan(CustomerObj).dumps([row])) == [expected]
+
+
+def test_device_plan_matches_schema():
+    row = Devices(id=3, is_active=False, is_delete=True)
+    expected = json.loads(DeviceObj.from_orm(row).json())
+    assert orjson.loads(field_plan(DeviceObj).dumps([row])) == [expected]
+
+
+@pytest.mark.parametrize("model", [CustomerObj, DeviceObj])
+def test_plan_covers_every_schema_field(model):
+    keys = [key for key, _, _ in field_plan(model).fields]
+    assert keys == [field.alias for field in model.__fields__.values()]
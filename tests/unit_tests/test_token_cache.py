@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+import pytest
+
+from app.utils.auth import (
+    REVOKED_TOKEN_TOPIC, check_existing_jwt_token, revoke_session,
+    token_cache
+)
+from app.utils.invalidation import InvalidationBus, invalidation_bus
+from app.utils.local_cache import TTLCache
+from app.utils.token_store import TokenEntry, TokenStore
+
+NOW = int(time.time())
+REFRESH = {"sub": "customer", "customer_id": 7, "jti": "r1",
+           "type": "refresh", "exp": NOW + 600}
+ACCESS = {**REFRESH, "jti": "a1", "type": "access", "exp": NOW + 60}
+
+
+@pytest.fixture
+def tokens(redis):
+    token_cache.clear()
+
+    async def issue():
+        await TokenStore(redis).add(
+            TokenStore.key_for(ACCESS),
+            TokenEntry("r1", "refresh", REFRESH["exp"]),
+            TokenEntry("a1", "access", ACCESS["exp"], refresh_jti="r1"),
+        )
+    asyncio.run(issue())
+    yield redis
+    token_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_cached_token_skips_redis(tokens):
+    assert await check_existing_jwt_token(ACCESS)
+    assert token_cache.get("a1") is True
+
+    # Gone from Redis, but this worker answers from its cache.
+    await tokens.delete(TokenStore.key_for(ACCESS))
+    assert await check_existing_jwt_token(ACCESS)
+
+
+@pytest.mark.asyncio
+async def test_cache_entry_ends_with_token(tokens):
+    expiring = {**ACCESS, "exp": time.time() + 0.05}
+
+    assert await check_existing_jwt_token(expiring)
+    await asyncio.sleep(0.1)
+    assert token_cache.get("a1") is None
+
+
+@pytest.mark.asyncio
+async def test_revocation_evicts_local_entry(tokens):
+    assert await check_existing_jwt_token(ACCESS)
+
+    await revoke_session(tokens, ACCESS)
+
+    assert token_cache.get("a1") is None
+    assert not await check_existing_jwt_token(ACCESS)
+
+
+@pytest.mark.asyncio
+async def test_revocation_evicts_other_workers(tokens):
+    # Another worker: its own token cache, fed by its own bus listener.
+    other_cache = TTLCache("other-token", maxsize=10, ttl=60)
+    other_cache.set("a1", True)
+    other_bus = InvalidationBus(invalidation_bus.channel, redis=tokens)
+    other_bus.register(
+        REVOKED_TOKEN_TOPIC, lambda jtis: other_cache.delete(*jtis))
+    other_bus.start()
+    await asyncio.sleep(0.05)   # let it subscribe
+
+    await revoke_session(tokens, ACCESS)
+    for _ in range(20):
+        if other_cache.get("a1") is None:
+            break
+        await asyncio.sleep(0.01)
+
+    assert other_cache.get("a1") is None
+    await other_bus.stop()
@@ -0,0 +1,264 @@
+import asyncio
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from fastapi_jwt_auth import AuthJWT
+from redis.exceptions import ConnectionError
+
+from app.config import config
+from app.main import app
+from app.scripts.migrate_token_store import legacy_key_pattern, migrate
+from app.utils.auth import create_auth_tokens, customer_claims
+from app.utils.token_store import TokenEntry, TokenStore
+
+NOW = int(time.time())
+KEY = TokenStore.key("customer", 7)
+
+
+def raw_jwt(jti: str, type: str = "access"):
+    return {"sub": "customer", "customer_id": 7, "jti": jti, "type": type}
+
+
+def session(n: int, accesses: int = 2):
+    """Refresh token ``r<n>`` and access tokens issued from it."""
+    return [TokenEntry(f"r{n}", "refresh", NOW + 600)] + [
+        TokenEntry(f"a{n}.{i}", "access", NOW + 60, refresh_jti=f"r{n}")
+        for i in range(accesses)
+    ]
+
+
+async def jtis(store: TokenStore):
+    return sorted(e.jti for e in await store.entries(KEY))
+
+
+def test_token_entry_round_trip():
+    entry = TokenEntry(jti="a", type="access", exp=100, refresh_jti="r")
+    assert TokenEntry.loads("a", entry.dumps().encode()) == entry
+
+    refresh = TokenEntry(jti="r", type="refresh", exp=200)
+    assert TokenEntry.loads("r", refresh.dumps().encode()) == refresh
+
+
+def test_token_entry_expiry():
+    now = time.time()
+    assert TokenEntry("a", "access", int(now) - 1).expired(now)
+    assert not TokenEntry("a", "access", int(now) + 60).expired(now)
+
+
+def test_legacy_keys_do_not_match_token_store_keys():
+    pattern = legacy_key_pattern()
+    legacy = pattern.match("/api/auth/customer/7/access_token/abc")
+
+    assert legacy.group("id") == "7" and legacy.group("type") == "access"
+    assert pattern.match(TokenStore.key("customer", 7)) is None
+
+
+@pytest.mark.asyncio
+async def test_add_prunes_and_expires_with_refresh_token(redis):
+    store = TokenStore(redis)
+    await store.add(KEY, TokenEntry("old", "access", NOW - 1))
+
+    assert await store.add(KEY, *session(1))
+    assert await jtis(store) == ["a1.0", "a1.1", "r1"]
+    assert await redis.expiretime(KEY) == NOW + 600
+    assert await store.get(raw_jwt("a1.0")) == session(1)[1]
+
+
+@pytest.mark.asyncio
+async def test_add_requires_valid_refresh_token(redis):
+    store = TokenStore(redis)
+    await store.add(KEY, *session(1, accesses=0))
+    access = TokenEntry("a2", "access", NOW + 60, refresh_jti="r1")
+
+    assert not await store.add(KEY, access, require="missing")
+    assert await jtis(store) == ["r1"]
+    assert await store.add(KEY, access, require="r1")
+    assert await jtis(store) == ["a2", "r1"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("token", [raw_jwt("a1.0"), raw_jwt("r1", "refresh")])
+async def test_revoke_session(redis, token):
+    store = TokenStore(redis)
+    await store.add(KEY, *session(1), *session(2))
+    await redis.hset(KEY, "old", TokenEntry("old", "access", NOW - 1).dumps())
+
+    revoked = await store.revoke_session(token)
+
+    assert sorted(revoked) == ["a1.0", "a1.1", "old", "r1"]
+    assert await jtis(store) == ["a2.0", "a2.1", "r2"]
+
+
+@pytest.mark.asyncio
+async def test_revoke_session_of_unknown_token(redis):
+    store = TokenStore(redis)
+    await store.add(KEY, *session(1))
+
+    assert await store.revoke_session(raw_jwt("gone")) == []
+    assert await jtis(store) == ["a1.0", "a1.1", "r1"]
+
+
+@pytest.mark.asyncio
+async def test_revoke_all(redis):
+    store = TokenStore(redis)
+    await store.add(KEY, *session(1), *session(2))
+
+    revoked = await store.revoke_all(raw_jwt("a1.0"))
+
+    assert sorted(revoked) == ["a1.0", "a1.1", "a2.0", "a2.1", "r1", "r2"]
+    assert not await redis.exists(KEY)
+
+
+def legacy_key(type: str, jti: str) -> str:
+    return f"/{config.redis.redis_prefix}/auth/customer/7/{type}_token/{jti}"
+
+
+@pytest.fixture
+def legacy_tokens(redis):
+    async def write():
+        await redis.set(legacy_key("refresh", "r1"), json.dumps({}))
+        await redis.set(legacy_key("access", "a1"),
+                        json.dumps({"jwt_refresh": "r1"}), ex=60)
+    return write
+
+
+@pytest.mark.asyncio
+async def test_migrate_moves_legacy_keys(redis, legacy_tokens):
+    await legacy_tokens()
+
+    assert await migrate(redis) == (2, 1)
+
+    store = TokenStore(redis)
+    access = await store.get(raw_jwt("a1"))
+    assert access.refresh_jti == "r1" and access.exp <= time.time() + 60
+    refresh = await store.get(raw_jwt("r1", "refresh"))
+    assert refresh.exp >= NOW + config.jwt.authjwt_refresh_token_expires
+    assert await redis.keys("*_token/*") == []
+
+
+@pytest.mark.asyncio
+async def test_migrate_dry_run_writes_nothing(redis, legacy_tokens):
+    await legacy_tokens()
+
+    assert await migrate(redis, dry_run=True) == (2, 1)
+    assert len(await redis.keys("*_token/*")) == 2
+    assert not await redis.exists(KEY)
+
+
+@pytest.fixture
+def logged_in(redis):
+    """Two sessions of customer 7; returns their access tokens."""
+    async def login():
+        authorize = AuthJWT()
+        return [
+            (await create_auth_tokens(
+                authorize, "customer", redis,
+                customer_claims(customer_id=7)))[0]
+            for _ in range(2)
+        ]
+    return asyncio.run(login())
+
+
+def post(path: str, access_token: str):
+    # Rejected tokens reach the catch-all handler: 400, re-raised in tests.
+    return TestClient(app, raise_server_exceptions=False).post(
+        f"{config.OPENAPI_PREFIX}/customer/{path}",
+        headers={"Authorization": f"Bearer {access_token}"})
+
+
+def test_logout_ends_one_session(logged_in):
+    first, second = logged_in
+
+    assert post("logout", first).status_code == 204
+    assert post("logout", first).status_code == 400
+    assert post("logout", second).status_code == 204
+
+
+def test_logout_all_ends_every_session(logged_in):
+    first, second = logged_in
+
+    assert post("logout-all", first).status_code == 204
+    assert post("logout", second).status_code == 400
+
+
+def test_logout_survives_publish_failure(logged_in, redis, monkeypatch):
+    first, second = logged_in
+
+    async def publish(*args):
+        raise ConnectionError("pub/sub down")
+    monkeypatch.setattr(redis, "publish", publish)
+
+    # The revocation is stored before the broadcast fails.
+    assert post("logout", first).status_code == 204
+    assert post("logout", first).status_code == 400
+    assert post("logout-all", second).status_code == 204
+
+
+@pytest.mark.asyncio
+async def test_rotation_relinks_access_tokens(redis):
+    store = TokenStore(redis)
+    await store.add(KEY, *session(1))
+    rotated = [TokenEntry("r2", "refresh", NOW + 900),
+               TokenEntry("a2", "access", NOW + 60, refresh_jti="r2")]
+
+    assert await store.add(KEY, *rotated, require="r1", replace=True)
+
+    assert await jtis(store) == ["a1.0", "a1.1", "a2", "r2"]
+    assert {e.refresh_jti for e in await store.entries(KEY)} == {"r2", None}
+    assert await redis.expiretime(KEY) == NOW + 900
+
+
+@pytest.mark.asyncio
+async def test_rotated_refresh_token_cannot_be_reused(redis):
+    store = TokenStore(redis)
+    await store.add(KEY, *session(1))
+    await store.add(KEY, TokenEntry("r2", "refresh", NOW + 600),
+                    require="r1", replace=True)
+
+    reused = TokenEntry("a2", "access", NOW + 60, refresh_jti="r1")
+    assert not await store.add(KEY, reused, require="r1")
+    assert await store.get(raw_jwt("a2")) is None
+
+
+@pytest.mark.asyncio
+async def test_revoking_rotated_session_revokes_earlier_tokens(redis):
+    store = TokenStore(redis)
+    await store.add(KEY, *session(1), *session(3))
+    await store.add(KEY, TokenEntry("r2", "refresh", NOW + 600),
+                    require="r1", replace=True)
+
+    revoked = await store.revoke_session(raw_jwt("r2", "refresh"))
+
+    assert sorted(revoked) == ["a1.0", "a1.1", "r2"]
+    assert await jtis(store) == ["a3.0", "a3.1", "r3"]
+
+
+@pytest.fixture
+def rotating(redis, monkeypatch):
+    """One session of customer 7 with refresh token rotation on; returns
+    its access and refresh tokens."""
+    monkeypatch.setattr(config.jwt, "refresh_token_rotate", True)
+
+    async def login():
+        return await create_auth_tokens(
+            AuthJWT(), "customer", redis, customer_claims(customer_id=7))
+    return asyncio.run(login())
+
+
+def test_refresh_rotates_and_keeps_session(rotating):
+    access_token, refresh_token = rotating
+
+    response = post("refresh", refresh_token)
+    assert response.status_code == 200
+    new_refresh = response.json()["refresh_token"]
+    assert new_refresh not in (None, refresh_token)
+
+    # The old refresh token is spent; the new one works once.
+    assert post("refresh", refresh_token).status_code == 400
+    new_access = post("refresh", new_refresh).json()["access_token"]
+
+    # Logging out from the first access token ends the rotated session.
+    assert post("logout", access_token).status_code == 204
+    assert post("logout", new_access).status_code == 400